@@ -2,9 +2,19 @@ from .application import Application
 from .router import Router
 from .server import Server
 from .request import Request
-from .response import Response
+from .response import Response, StreamingResponse, StreamingJSONResponse
 from .middleware import Middleware
 from .testing import Client
 
 
-__all__ = ('Application', 'Server', 'Router', 'Middleware', 'Response', 'Request', 'Client')
+__all__ = (
+    'Application',
+    'Server',
+    'Router',
+    'Middleware',
+    'Response',
+    'StreamingResponse',
+    'StreamingJSONResponse',
+    'Request',
+    'Client'
+)
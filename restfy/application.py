@@ -1,10 +1,13 @@
 import asyncio
 import datetime
+import functools
 import time
 import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from typing import List
 from .request import Request, AccessControl
-from .response import Response
+from .response import Response, http_date
+from .codec import Codec, default_codec
 from .router import Router, Route
 from .middleware import Middleware
 from .connection import Connection, H1Connection, H2Connection
@@ -17,18 +20,38 @@ class Application:
             description: str = '',
             *,
             base_url: str = '',
-            prepare_request_data: bool = True
+            prepare_request_data: bool = True,
+            max_header_list_size: int = 65536,
+            h2_max_streams: int = 0,
+            h2_max_age: float = 0,
+            route_cache_size: int = 0,
+            max_workers: int | None = None,
+            max_processes: int | None = None,
+            codec: Codec | None = None,
+            multipart_spool_size: int = 1024 * 1024,
+            multipart_max_field_size: int = 1024 * 1024,
+            max_query_fields: int = 1000
     ):
         self.title = title
         self.description = description
-        self.router = Router(base_url=base_url)
+        self.router = Router(base_url=base_url, cache_size=route_cache_size)
         self.cors = AccessControl()
-        self.middlewares: List[Middleware] = []
+        self.middlewares: List[Middleware] = self.router.middlewares
         self.prepare_request_data = prepare_request_data
+        self.max_header_list_size = max_header_list_size
+        self.h2_max_streams = h2_max_streams
+        self.h2_max_age = h2_max_age
+        self.max_workers = max_workers
+        self.max_processes = max_processes
+        self.codec: Codec = codec or default_codec
+        self.multipart_spool_size = multipart_spool_size
+        self.multipart_max_field_size = multipart_max_field_size
+        self.max_query_fields = max_query_fields
+        self.executors: dict[str, Executor] = {}
         self.connections: dict[uuid.UUID, Connection] = {}
 
-    def add_route(self, path, handle, method='GET'):
-        self.router.add_route(path, handle, method)
+    def add_route(self, path, handle, method='GET', **options):
+        self.router.add_route(path, handle, method=method, **options)
 
     def register_router(self, path, router):
         self.router.register_router(path, router)
@@ -38,48 +61,98 @@ class Application:
             reader: asyncio.streams.StreamReader,
             writer: asyncio.streams.StreamWriter
     ):
+        ssl_object = writer.get_extra_info('ssl_object')
+        if ssl_object and ssl_object.selected_alpn_protocol() == 'h2':
+            conn = self.connect(H2Connection, reader=reader, writer=writer)
+            await conn.handler(b'')
+            return
         data = await reader.readline()
         if data == b'PRI * HTTP/2.0\r\n':
-            conn = H2Connection(reader=reader, writer=writer)
+            conn = self.connect(H2Connection, reader=reader, writer=writer)
         else:
-            conn = H1Connection(reader=reader, writer=writer)
-        conn.middlewares = self.middlewares
+            conn = self.connect(H1Connection, reader=reader, writer=writer)
+        await conn.handler(data)
+
+    def connect(
+            self,
+            kind: type[Connection],
+            *,
+            reader: asyncio.streams.StreamReader,
+            writer: asyncio.streams.StreamWriter
+    ) -> Connection:
+        conn = kind(reader=reader, writer=writer)
+        if isinstance(conn, H2Connection):
+            conn.max_header_list_size = self.max_header_list_size
+            conn.max_streams = self.h2_max_streams
+            conn.max_age = self.h2_max_age
         conn.router = self.router
         conn.cors = self.cors
         conn.prepare_request_data = self.prepare_request_data
         conn.app = self
         self.connections[conn.id] = conn
-        await conn.handler(data)
+        return conn
 
     def connection_close(self):
         ...
 
-    def register_middleware(self, middleware: type[Middleware]):
-        instance = middleware()
-        if self.middlewares:
-            self.middlewares[-1].next = instance
-        self.middlewares.append(instance)
+    def register_executor(self, name: str, executor: Executor):
+        self.executors[name] = executor
+
+    def get_executor(self, name: str = 'default') -> Executor:
+        if name not in self.executors:
+            match name:
+                case 'default':
+                    executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='restfy')
+                case 'process':
+                    executor = ProcessPoolExecutor(max_workers=self.max_processes)
+                case _:
+                    raise KeyError(f'Executor "{name}" is not registered')
+            self.executors[name] = executor
+        return self.executors[name]
+
+    async def run_in_executor(self, func: callable, *args, executor: str = 'default', **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get_executor(executor), functools.partial(func, *args, **kwargs))
+
+    async def startup(self):
+        self.router.compile()
+        http_date.start()
+
+    async def shutdown(self, timeout: float = 10):
+        tasks = [asyncio.create_task(conn.shutdown()) for conn in list(self.connections.values())]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+        for executor in self.executors.values():
+            executor.shutdown(wait=False)
+        self.executors.clear()
+        http_date.stop()
+
+    def register_middleware(self, middleware: type[Middleware] | Middleware):
+        self.router.register_middleware(middleware)
+
+    def route(self, path, method='GET', *, websocket=False, **options):
+        return self.router.route(path, method, websocket=websocket, **options)
 
-    def get(self, path):
-        return self.router.get(path)
+    def get(self, path, **options):
+        return self.router.get(path, **options)
 
-    def post(self, path):
-        return self.router.post(path)
+    def post(self, path, **options):
+        return self.router.post(path, **options)
 
-    def put(self, path):
-        return self.router.put(path)
+    def put(self, path, **options):
+        return self.router.put(path, **options)
 
-    def delete(self, path):
-        return self.router.delete(path)
+    def delete(self, path, **options):
+        return self.router.delete(path, **options)
 
-    def patch(self, path):
-        return self.router.patch(path)
+    def patch(self, path, **options):
+        return self.router.patch(path, **options)
 
-    def options(self, path):
-        return self.router.options(path)
+    def options(self, path, **options):
+        return self.router.options(path, **options)
 
-    def head(self, path):
-        return self.router.head(path)
+    def head(self, path, **options):
+        return self.router.head(path, **options)
 
-    def websocket(self, path):
-        return self.router.websocket(path)
+    def websocket(self, path, **options):
+        return self.router.websocket(path, **options)
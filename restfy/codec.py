@@ -0,0 +1,35 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any
+from .serializer import serialize
+
+
+class JSONEncoder(json.JSONEncoder):
+    def default(self, o: Any) -> Any:
+        return serialize(o)
+
+
+class Codec(ABC):
+    content_type = 'application/json'
+
+    @abstractmethod
+    def encode(self, data: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def decode(self, data: bytes | str) -> Any:
+        ...
+
+
+class JSONCodec(Codec):
+    def __init__(self, encoder: type[json.JSONEncoder] = JSONEncoder):
+        self.encoder = encoder
+
+    def encode(self, data: Any) -> bytes:
+        return json.dumps(data, cls=self.encoder).encode()
+
+    def decode(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+default_codec = JSONCodec()
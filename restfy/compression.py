@@ -0,0 +1,147 @@
+import gzip
+import zlib
+from collections.abc import AsyncIterator
+from restfy.middleware import Middleware
+from restfy.request import Request
+from restfy.response import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+compressible_types = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def parse_accept_encoding(value: str) -> dict[str, float]:
+    encodings = {}
+    for item in value.split(','):
+        (name, *params) = item.split(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            (key, _, val) = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(val)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+class Compressor:
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=min(level, 11))
+        else:
+            wbits = 31 if encoding == 'gzip' else 15
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self.compressor.process(data) + self.compressor.flush()
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    match encoding:
+        case 'br':
+            return brotli.compress(data, quality=min(level, 11))
+        case 'gzip':
+            return gzip.compress(data, compresslevel=level, mtime=0)
+        case _:
+            return zlib.compress(data, level)
+
+
+def add_vary(response: Response, name: str):
+    vary = response.headers.get('Vary', '')
+    values = [value.strip().lower() for value in vary.split(',')]
+    if name.lower() in values or '*' in values:
+        return
+    response.headers['Vary'] = f'{vary}, {name}' if vary else name
+
+
+class CompressionMiddleware(Middleware):
+    def __init__(
+            self,
+            *,
+            minimum_size: int = 500,
+            level: int = 6,
+            thread_size: int = 65536,
+            content_types: tuple[str, ...] = compressible_types,
+            executor: str = 'default'
+    ):
+        super().__init__()
+        self.minimum_size = minimum_size
+        self.level = level
+        self.thread_size = thread_size
+        self.content_types = content_types
+        self.executor = executor
+        self.encodings = ('br', 'gzip', 'deflate') if brotli else ('gzip', 'deflate')
+
+    async def exec(self, request: Request) -> Response:
+        response = await self.forward(request)
+        if request.method == 'HEAD' or response.status in (204, 206, 304) or 'Content-Encoding' in response.headers:
+            return response
+        response.prepare()
+        content_type = response.headers.get('Content-Type', '')
+        if not content_type.startswith(self.content_types):
+            return response
+        add_vary(response, 'Accept-Encoding')
+        encoding = self.choose(request.headers.get('Accept-Encoding', ''))
+        if not encoding:
+            return response
+        if response.streaming:
+            response.headers.pop('Content-Length', None)
+            response.filters.append(lambda chunks: self.compress_stream(chunks, encoding))
+        elif len(response.body) >= self.minimum_size:
+            if len(response.body) >= self.thread_size and request.app:
+                body = await request.app.run_in_executor(
+                    compress, response.body, encoding, self.level, executor=self.executor
+                )
+            else:
+                body = compress(response.body, encoding, self.level)
+            response.body = body
+            response.content = body
+            response.headers['Content-Length'] = len(body)
+        else:
+            return response
+        response.headers['Content-Encoding'] = encoding
+        etag = response.headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            response.headers['ETag'] = f'W/{etag}'
+        return response
+
+    def choose(self, value: str) -> str:
+        accepted = parse_accept_encoding(value)
+        wildcard = accepted.get('*', 0.0)
+        best = ('', 0.0)
+        for encoding in self.encodings:
+            quality = accepted.get(encoding, wildcard)
+            if quality > best[1]:
+                best = (encoding, quality)
+        return best[0]
+
+    async def compress_stream(self, chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+        compressor = Compressor(encoding, self.level)
+        async for chunk in chunks:
+            if data := compressor.compress(chunk):
+                yield data
+        yield compressor.finish()
@@ -0,0 +1,69 @@
+import datetime
+import email.utils
+import hashlib
+from restfy.middleware import Middleware
+from restfy.request import Request
+from restfy.response import Response
+
+
+preserved_headers = ('ETag', 'Last-Modified', 'Cache-Control', 'Expires', 'Vary', 'Content-Location')
+
+
+def compute_etag(body: bytes, weak: bool = False) -> str:
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def parse_http_date(value: str) -> datetime.datetime:
+    date = email.utils.parsedate_to_datetime(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return date
+
+
+def is_not_modified(request: Request, etag: str = '', last_modified: str = '') -> bool:
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        if not etag:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or strip_weak(etag) in [strip_weak(tag) for tag in tags]
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since and last_modified:
+        try:
+            since = parse_http_date(if_modified_since)
+            modified = parse_http_date(last_modified)
+        except (TypeError, ValueError):
+            return False
+        return modified <= since
+    return False
+
+
+def not_modified(response: Response) -> Response:
+    headers = {key: response.headers[key] for key in preserved_headers if key in response.headers}
+    return Response(status=304, headers=headers)
+
+
+class ConditionalMiddleware(Middleware):
+    def __init__(self, *, weak: bool = False):
+        super().__init__()
+        self.weak = weak
+
+    async def exec(self, request: Request) -> Response:
+        response = await self.forward(request)
+        if request.method not in ('GET', 'HEAD') or response.status != 200:
+            return response
+        etag = response.headers.get('ETag', '')
+        if not etag:
+            if response.streaming:
+                return response
+            response.prepare()
+            etag = compute_etag(response.body, weak=self.weak)
+            response.headers['ETag'] = etag
+        if is_not_modified(request, etag, response.headers.get('Last-Modified', '')):
+            return not_modified(response)
+        return response
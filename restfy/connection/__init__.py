@@ -1,19 +1,27 @@
 import asyncio
+import base64
 import datetime
 import enum
+import inspect
 import queue
 import time
+import traceback
 import uuid
 from collections import deque
 
 from restfy.request import Request, AccessControl
-from restfy.response import Response
-from restfy.middleware import Middleware
+from restfy.response import Response, versions
 from restfy.websocket import prepare_websocket
-from restfy.router import Router, Route
+from restfy.router import Router, Match
+from restfy.query import TooManyFields, parse_query
+from restfy.multipart import MultipartError
+from restfy.handler import BindError
 from restfy.connection import frame
 
 
+PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+
+
 class ConnectionStatus(enum.Enum):
     OPENING = 0
     CLOSING = 1
@@ -37,9 +45,9 @@ class Connection:
         self.cors: AccessControl = AccessControl()
         self.prepare_request_data: bool = True
         self.status: ConnectionStatus = ConnectionStatus.OPENED
-        self.middlewares: list[Middleware] = []
         self.router: Router | None = None
         self.app = None
+        self.closed = asyncio.Event()
 
     async def handler(self, data: bytes):
         ...
@@ -47,26 +55,64 @@ class Connection:
     async def close(self):
         self.writer.close()
         await self.writer.wait_closed()
-        del self.app.connections[self.id]
+        self.app.connections.pop(self.id, None)
+        self.closed.set()
+
+    async def shutdown(self):
+        await self.closed.wait()
+
+    async def execute_headers_hooks(self, match: Match | None, request: Request) -> Response | None:
+        if not match:
+            return None
+        for hook in match.on_headers:
+            response = hook(request)
+            if inspect.isawaitable(response):
+                response = await response
+            if response is not None:
+                return response
+        return None
+
+    async def execute_response_hooks(self, match: Match | None, request: Request, response: Response):
+        if not match:
+            return
+        for hook in match.on_response:
+            try:
+                ret = hook(request, response)
+                if inspect.isawaitable(ret):
+                    await ret
+            except Exception:
+                traceback.print_exc()
 
-    async def execute_handler(self, request: Request):
-        if route := self.router.match(request.url, request.method):
-            response = await self.execute_middlewares(route, request)
+    async def execute_handler(self, request: Request, match: Match | None = None):
+        if match is None:
+            match = self.router.match(request.url, request.method)
+        if match is None:
+            response = Response(status=404)
+        elif match.handler is None:
+            response = self.answer_method(match, request)
+        else:
+            try:
+                response = await match.exec(request)
+            except (BindError, TooManyFields, MultipartError) as e:
+                response = Response({'message': 'Bad Request', 'detail': str(e)}, status=400)
             if request.origin:
                 response.headers.update(self.cors.get_response_headers())
-            if route.is_websocket:
+            if match.route.is_websocket:
                 prepare_websocket(request=request, response=response)
-        else:
-            response = Response(status=404)
+        if request.method == 'HEAD':
+            response.prepare(body=False)
+            response.body = b''
+            response.streaming = False
         return response
 
-    async def execute_middlewares(self, route: Route, request: Request) -> Response:
-        if self.middlewares:
-            self.middlewares[-1].next = route
-            response = await self.middlewares[0].exec(request)
-        else:
-            response = await route.exec(request)
-        return response
+    def answer_method(self, match: Match, request: Request) -> Response:
+        headers = {'Allow': match.route.allow}
+        if request.method != 'OPTIONS':
+            return Response(status=405, headers=headers)
+        if request.origin:
+            headers.update(self.cors.get_response_headers())
+            headers.setdefault('Access-Control-Allow-Methods', match.route.allow)
+        return Response(status=204, headers=headers)
 
     def generate_request(
             self,
@@ -76,27 +122,13 @@ class Connection:
     ) -> Request:
         request = Request(method=method, version=version)
         request.app = self.app
-        splt = url.split('?')
-        path, query = splt[0], splt[1] if len(splt) > 1 else ''
+        (path, _, query) = url.partition('?')
         request.url = path
         request.query = query
-        args = self.extract_arguments(query=query)
-        request.query_args = args
-        request.params = {**args}
         return request
 
     def extract_arguments(self, query):
-        ret = {}
-        if query:
-            pairs = query.split('&')
-            for pair in pairs:
-                (key, value) = tuple(pair.split('='))
-                ret[key] = self.argument_decode(value)
-        return ret
-
-    @staticmethod
-    def argument_decode(value):
-        return value
+        return parse_query(query)
 
     @staticmethod
     def print_request(start, method, url, response, diff):
@@ -135,7 +167,21 @@ class H2Connection(Connection):
     ):
         super().__init__(reader=reader, writer=writer)
         self.frames = {}
-        self.dynamic_table = []
+        self.dynamic_table = frame.DynamicTable()
+        self.settings = frame.SettingConfig()
+        self.max_header_list_size: int = 65536
+        self.max_streams: int = 0
+        self.max_age: float = 0
+        self.next_push_stream: int = 2
+        self.last_stream_id: int = 0
+        self.streams_count: int = 0
+        self.error_code: frame.ErrorCode = frame.ErrorCode.NO_ERROR
+        self.streams: dict[int, tuple[Request, Match | None]] = {}
+        self.tasks: dict[int, asyncio.Task] = {}
+        self.send_window: int = 65535
+        self.stream_windows: dict[int, int] = {}
+        self.window_updated = asyncio.Event()
+        self.receiving: bool = True
 
     @staticmethod
     def get_frame(frame_header: bytes, connection: 'H2Connection'):
@@ -158,72 +204,280 @@ class H2Connection(Connection):
         )
         return frm
 
-    def add_dynamic_table_element(self, value: str):
-        self.dynamic_table.append(value)
+    @property
+    def max_header_block_size(self) -> int:
+        # A compressed byte never decodes to less than a quarter byte of the header list
+        return self.max_header_list_size * 4
 
-    def get_dynamic_table_element(self, key):
-        return self.dynamic_table[key - 61]
+    @property
+    def scheme(self) -> str:
+        return 'https' if self.writer.get_extra_info('ssl_object') else 'http'
 
     async def handler(self, data: bytes):
-        data += await self.reader.read(8)
-        blk = b'\x00\x00\x00\x04\x00\x00\x00\x00\x00'
-        self.writer.write(blk)
-        settings = frame.SettingConfig()
-        streams = {}
+        data += await self.reader.readexactly(len(PREFACE) - len(data))
+        if data != PREFACE:
+            await self.close()
+            return
+        self.writer.write(self.generate_settings_block())
+        await self.serve()
+
+    async def upgrade(self, request: Request, settings: str):
+        fme = frame.SettingFrame(
+            length=b'\x00\x00\x00',
+            flags=0,
+            stream=b'\x00\x00\x00\x00',
+            connection=self
+        )
+        fme.set_payload(base64.urlsafe_b64decode(settings + '=' * (-len(settings) % 4)))
+        self.settings = fme.payload
+        self.writer.write(self.generate_settings_block())
+        data = await self.reader.readexactly(len(PREFACE))
+        if data != PREFACE:
+            await self.close()
+            return
+        self.dispatch(request, stream=1)
+        self.open_stream(1)
+        await self.serve()
+
+    async def serve(self):
+        timer = None
+        if self.max_age:
+            timer = asyncio.get_running_loop().call_later(self.max_age, self.goaway)
+        block: frame.HeaderFrame | None = None
+        fragments = bytearray()
         while True:
             try:
-                frame_header = await self.reader.read(9)
-            except Exception as e:
-                break
-            if not frame_header:
-                continue
-            fme = self.get_frame(frame_header, self)
-            chunk = await self.reader.read(fme.length)
-            if not chunk:
-                continue
-            fme.set_payload(chunk)
-            if fme.stream not in streams:
-                streams[fme.stream] = {'frames': {}}
-            streams[fme.stream]['frames'][fme.id] = fme
-            match fme:
-                case frame.HeaderFrame():
-                    headers = fme.payload
-                    method = headers.pop('method')
-                    version = '2'
-                    url = headers['path']
-                    request = self.generate_request(url=url, method=method, version=version)
-                    for k, v in headers.items():
-                        request.add_header(k, v)
-                    streams[fme.stream]['request'] = request
-                    if method == 'GET' and fme.end_headers:
-                        await self.process_response(request, stream=fme.stream)
-                case frame.DataFrame():
-                    request = streams[fme.stream]['request']
-                    request.body = fme.payload
-                    if fme.end_stream:
-                        await self.process_response(request, stream=fme.stream)
-                case frame.RSTStreamFrame():
+                frame_header = await self.reader.readexactly(9)
+                fme = self.get_frame(frame_header, self)
+                if fme.length > frame.SettingConfig.max_frame_size:
+                    self.goaway(frame.ErrorCode.FRAME_SIZE_ERROR)
                     break
-                case frame.GoawayFrame():
-                    break
-                case frame.WindowUpdateFrame():
-                    settings.initial_window_size = fme.payload
-                case frame.PingFrame():
-                    ...
-                case frame.ContinuationFrame():
-                    ...
-                case frame.PushPromisseFrame():
-                    ...
-                case frame.PriorityFrame():
-                    ...
-                case frame.SettingFrame():
-                    settings = fme.payload
-                    if fme.flags == 0:
-                        blk = b'\x00\x00\x00\x04\x01\x00\x00\x00\x00'
-                        self.writer.write(blk)
-                        await self.writer.drain()
+                chunk = await self.reader.readexactly(fme.length)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            try:
+                if chunk:
+                    fme.set_payload(chunk)
+            except Exception:
+                self.goaway(frame.ErrorCode.COMPRESSION_ERROR)
+                break
+            if block and not (isinstance(fme, frame.ContinuationFrame) and fme.stream == block.stream):
+                self.goaway(frame.ErrorCode.PROTOCOL_ERROR)
+                break
+            try:
+                match fme:
+                    case frame.PushPromisseFrame():
+                        self.goaway(frame.ErrorCode.PROTOCOL_ERROR)
+                        break
+                    case frame.HeaderFrame():
+                        if fme.end_headers:
+                            if fme.header_list_size > self.max_header_list_size:
+                                self.goaway(frame.ErrorCode.ENHANCE_YOUR_CALM)
+                                break
+                            await self.process_headers(fme)
+                        elif len(fme.fragment) > self.max_header_block_size:
+                            self.goaway(frame.ErrorCode.ENHANCE_YOUR_CALM)
+                            break
+                        else:
+                            block = fme
+                            fragments = bytearray(fme.fragment)
+                    case frame.DataFrame():
+                        if fme.length:
+                            self.writer.write(self.generate_window_update_block(stream=0, increment=fme.length))
+                        if fme.stream not in self.streams:
+                            continue
+                        if fme.length and not fme.end_stream:
+                            self.writer.write(self.generate_window_update_block(stream=fme.stream, increment=fme.length))
+                        (request, match) = self.streams[fme.stream]
+                        try:
+                            if fme.payload:
+                                request.feed(fme.payload)
+                            if fme.end_stream:
+                                request.finish()
+                        except MultipartError as e:
+                            response = Response({'message': 'Bad Request', 'detail': str(e)}, status=400)
+                            self.dispatch(request, stream=fme.stream, match=match, response=response, reset=not fme.end_stream)
+                            continue
+                        if fme.end_stream:
+                            self.dispatch(request, stream=fme.stream, match=match)
+                    case frame.RSTStreamFrame():
+                        self.streams.pop(fme.stream, None)
+                        self.stream_windows.pop(fme.stream, None)
+                        if task := self.tasks.get(fme.stream):
+                            task.cancel()
+                    case frame.GoawayFrame():
+                        self.status = ConnectionStatus.CLOSING
+                        self.check_drained()
+                    case frame.WindowUpdateFrame():
+                        if fme.stream == 0:
+                            self.send_window += fme.payload
+                        elif fme.stream in self.stream_windows:
+                            self.stream_windows[fme.stream] += fme.payload
+                        self.notify_window()
+                    case frame.PingFrame():
+                        ...
+                    case frame.ContinuationFrame():
+                        if not block:
+                            self.goaway(frame.ErrorCode.PROTOCOL_ERROR)
+                            break
+                        fragments += fme.fragment
+                        if len(fragments) > self.max_header_block_size:
+                            self.goaway(frame.ErrorCode.ENHANCE_YOUR_CALM)
+                            break
+                        if fme.end_headers:
+                            try:
+                                block.payload = block.decode_payload(value=bytes(fragments))
+                            except Exception:
+                                self.goaway(frame.ErrorCode.COMPRESSION_ERROR)
+                                break
+                            if block.header_list_size > self.max_header_list_size:
+                                self.goaway(frame.ErrorCode.ENHANCE_YOUR_CALM)
+                                break
+                            await self.process_headers(block)
+                            block = None
+                            fragments = bytearray()
+                    case frame.PriorityFrame():
+                        ...
+                    case frame.SettingFrame():
+                        if fme.flags == 0:
+                            initial_window_size = self.settings.initial_window_size
+                            self.settings = fme.payload or self.settings
+                            delta = self.settings.initial_window_size - initial_window_size
+                            if delta:
+                                for stream in self.stream_windows:
+                                    self.stream_windows[stream] += delta
+                                self.notify_window()
+                            blk = b'\x00\x00\x00\x04\x01\x00\x00\x00\x00'
+                            self.writer.write(blk)
+                            await self.writer.drain()
+            except Exception:
+                traceback.print_exc()
+                self.goaway(frame.ErrorCode.INTERNAL_ERROR)
+                break
+        if timer:
+            timer.cancel()
+        self.receiving = False
+        self.notify_window()
+        if self.error_code:
+            for task in self.tasks.values():
+                task.cancel()
+        if self.tasks:
+            await asyncio.wait(list(self.tasks.values()))
         await self.close()
 
+    async def process_headers(self, fme: frame.HeaderFrame):
+        if fme.stream in self.streams:
+            if fme.end_stream:
+                (request, match) = self.streams[fme.stream]
+                request.finish()
+                self.dispatch(request, stream=fme.stream, match=match)
+            return
+        if fme.stream <= self.last_stream_id or self.status == ConnectionStatus.CLOSING:
+            return
+        headers = fme.payload
+        if not all(headers.get(key) for key in ('method', 'scheme', 'path')):
+            self.last_stream_id = fme.stream
+            blk = self.generate_rst_stream_block(stream=fme.stream, error_code=frame.ErrorCode.PROTOCOL_ERROR)
+            self.writer.write(blk)
+            return
+        method = headers.pop('method')
+        version = '2'
+        url = headers['path']
+        request = self.generate_request(url=url, method=method, version=version)
+        for k, v in headers.items():
+            request.add_header(k, v)
+        match = self.router.match(request.url, request.method)
+        try:
+            response = await self.execute_headers_hooks(match, request)
+        except Exception as e:
+            response = Response({'message': 'Internal Server Error', 'detail': str(e)}, status=500)
+        if response is not None:
+            self.dispatch(request, stream=fme.stream, match=match, response=response, reset=not fme.end_stream)
+        elif fme.end_stream:
+            self.dispatch(request, stream=fme.stream, match=match)
+        else:
+            self.streams[fme.stream] = (request, match)
+        self.open_stream(fme.stream)
+
+    def open_stream(self, stream: int):
+        self.stream_windows[stream] = self.settings.initial_window_size
+        self.last_stream_id = stream
+        self.streams_count += 1
+        if self.max_streams and self.streams_count >= self.max_streams:
+            self.goaway()
+
+    def dispatch(
+            self,
+            request: Request,
+            stream: int,
+            match: Match | None = None,
+            response: Response | None = None,
+            reset: bool = False
+    ):
+        self.streams.pop(stream, None)
+        coro = self.process_response(request, stream=stream, match=match, response=response, reset=reset)
+        task = asyncio.create_task(coro)
+        self.tasks[stream] = task
+        task.add_done_callback(lambda t: self.stream_done(stream))
+
+    def stream_done(self, stream: int):
+        self.tasks.pop(stream, None)
+        self.check_drained()
+
+    def notify_window(self):
+        self.window_updated.set()
+        self.window_updated = asyncio.Event()
+
+    async def wait_window(self, stream: int) -> int:
+        while (available := min(self.send_window, self.stream_windows.get(stream, 0))) <= 0:
+            if not self.receiving:
+                raise ConnectionError('Connection closed while waiting for the flow control window')
+            await self.window_updated.wait()
+        return available
+
+    async def send_data(self, data: bytes, stream: int, end_stream: bool = True):
+        if not data and not end_stream:
+            return
+        view = memoryview(data)
+        offset = 0
+        while True:
+            size = min(len(view) - offset, self.settings.max_frame_size)
+            if size:
+                size = min(size, await self.wait_window(stream))
+                self.send_window -= size
+                self.stream_windows[stream] -= size
+            offset += size
+            last = offset == len(view)
+            blk = self.generate_data_frame_block(data=view[offset - size:offset], stream=stream, end_stream=end_stream and last)
+            self.writer.write(blk)
+            if last:
+                break
+        await self.writer.drain()
+
+    def check_drained(self):
+        if self.status == ConnectionStatus.CLOSING and not self.streams and not self.tasks:
+            self.writer.close()
+
+    def goaway(self, error_code: frame.ErrorCode = frame.ErrorCode.NO_ERROR, debug: bytes = b''):
+        if self.status != ConnectionStatus.CLOSING:
+            self.status = ConnectionStatus.CLOSING
+            self.error_code = error_code
+            fme = frame.GoawayFrame(
+                length=b'\x00\x00\x00',
+                flags=0,
+                stream=b'\x00\x00\x00\x00',
+                connection=self
+            )
+            fme.last_stream_id = self.last_stream_id
+            fme.error_code = error_code
+            fme.payload = debug
+            self.writer.write(fme.generate())
+        self.check_drained()
+
+    async def shutdown(self):
+        self.goaway()
+        await self.closed.wait()
+
     def validate_bulk(self, bulk: bytes) -> bool:
         frame_header = bulk[:9]
         fme = self.get_frame(frame_header, self)
@@ -231,23 +485,96 @@ class H2Connection(Connection):
         fme.set_payload(chunk)
         return True
 
-    async def process_response(self, request: Request, stream: int):
-        response: Response = await self.execute_handler(request=request)
+    async def process_response(
+            self,
+            request: Request,
+            stream: int,
+            match: Match | None = None,
+            response: Response | None = None,
+            reset: bool = False
+    ):
+        if response is None:
+            try:
+                response = await self.execute_handler(request=request, match=match)
+            except Exception as e:
+                response = Response({'message': 'Internal Server Error', 'detail': str(e)}, status=500)
+        try:
+            promises = await self.send_response(request, stream=stream, response=response, reset=reset)
+        except ConnectionError:
+            return
+        except Exception:
+            traceback.print_exc()
+            self.stream_windows.pop(stream, None)
+            blk = self.generate_rst_stream_block(stream=stream, error_code=frame.ErrorCode.INTERNAL_ERROR)
+            self.writer.write(blk)
+            return
+        diff = time.time_ns() - self.ini
+        self.print_request(self.start, request.method, request.url, response, diff)
+        await self.execute_response_hooks(match, request, response)
+        for pushed, pushed_match, promised in promises:
+            await self.process_response(pushed, stream=promised, match=pushed_match)
+
+    async def send_response(
+            self,
+            request: Request,
+            stream: int,
+            response: Response,
+            reset: bool = False
+    ) -> list[tuple[Request, Match, int]]:
+        response.prepare()
+        promises = []
+        if self.settings.enable_push and stream % 2:
+            for path in response.pushes:
+                pushed_match = self.router.match(path, 'GET')
+                if not pushed_match or not pushed_match.handler:
+                    continue
+                pushed = self.generate_request(url=path, method='GET', version=request.version)
+                for key in ('authority', 'scheme'):
+                    pushed.add_header(key, request.get_header(key))
+                try:
+                    rejected = await self.execute_headers_hooks(pushed_match, pushed)
+                except Exception:
+                    traceback.print_exc()
+                    continue
+                if rejected is not None:
+                    continue
+                promised = self.next_push_stream
+                self.next_push_stream += 2
+                self.stream_windows[promised] = self.settings.initial_window_size
+                blk = self.generate_push_promise_block(request=request, path=path, stream=stream, promised=promised)
+                self.writer.write(blk)
+                promises.append((pushed, pushed_match, promised))
         blk = self.generate_header_frame_block(response=response, stream=stream)
         self.writer.write(blk)
         await self.writer.drain()
-        blk = self.generate_data_frame_block(response=response, stream=stream)
-        self.writer.write(blk)
-        await self.writer.drain()
-        diff = time.time_ns() - self.ini
-        self.print_request(self.start, request.method, request.url, response, diff)
-        ...
+        if response.streaming:
+            async for chunk in response.stream():
+                await self.send_data(chunk, stream=stream, end_stream=False)
+            await self.send_data(b'', stream=stream)
+        elif response.body:
+            await self.send_data(response.body, stream=stream)
+        self.stream_windows.pop(stream, None)
+        if reset:
+            blk = self.generate_rst_stream_block(stream=stream, error_code=frame.ErrorCode.NO_ERROR)
+            self.writer.write(blk)
+        return promises
 
-    def generate_data_frame_block(self, response: Response, stream: int) -> bytes:
-        data = response.data.encode()
+    def generate_settings_block(self) -> bytes:
+        fme = frame.SettingFrame(
+            length=b'\x00\x00\x00',
+            flags=0,
+            stream=b'\x00\x00\x00\x00',
+            connection=self
+        )
+        fme.payload = {
+            frame.SettingsEnum.SETTINGS_MAX_HEADER_LIST_SIZE: self.max_header_list_size,
+        }
+        return fme.generate()
+
+    def generate_data_frame_block(self, data: bytes, stream: int, end_stream: bool = True) -> bytes:
         fme = frame.DataFrame(
             length=len(data).to_bytes(3, byteorder='big', signed=False),
-            flags=0b00000001,
+            flags=0b00000001 if end_stream else 0,
             stream=stream.to_bytes(4, byteorder='big', signed=False),
             connection=self
         )
@@ -255,59 +582,142 @@ class H2Connection(Connection):
         block = fme.generate()
         return block
 
+    def generate_window_update_block(self, stream: int, increment: int) -> bytes:
+        fme = frame.WindowUpdateFrame(
+            length=b'\x00\x00\x00',
+            flags=0,
+            stream=stream.to_bytes(4, byteorder='big', signed=False),
+            connection=self
+        )
+        fme.payload = increment
+        blk = fme.generate()
+        return blk
+
     def generate_header_frame_block(self, response: Response, stream: int) -> bytes:
         fme = frame.HeaderFrame(
+            length=b'\x00\x00\x00',
+            flags=0b00000100 if response.body or response.streaming else 0b00000101,
+            stream=stream.to_bytes(4, byteorder='big', signed=False),
+            connection=self
+        )
+        fme.payload = {'status': response.status, **response.headers}
+        blk = fme.generate()
+        return blk
+
+    def generate_rst_stream_block(self, stream: int, error_code: frame.ErrorCode) -> bytes:
+        fme = frame.RSTStreamFrame(
+            length=b'\x00\x00\x00',
+            flags=0,
+            stream=stream.to_bytes(4, byteorder='big', signed=False),
+            connection=self
+        )
+        fme.error_code = error_code
+        blk = fme.generate()
+        return blk
+
+    def generate_push_promise_block(self, request: Request, path: str, stream: int, promised: int) -> bytes:
+        fme = frame.PushPromisseFrame(
             length=b'\x00\x00\x00',
             flags=0b00000100,
             stream=stream.to_bytes(4, byteorder='big', signed=False),
             connection=self
         )
-        headers = response.headers
-        headers['Status'] = response.status
-        fme.payload = headers
+        fme.promised_stream = promised
+        fme.payload = {
+            'method': 'GET',
+            'scheme': request.get_header('scheme') or self.scheme,
+            'authority': request.get_header('authority') or request.get_header('Host'),
+            'path': path,
+        }
         blk = fme.generate()
-        h = blk[:9]
-        p = blk[9:]
-        l = len(p)
-        vfm = self.get_frame(h, self)
-        vfm.set_payload(p)
         return blk
 
 
 class H1Connection(Connection):
     async def handler(self, data: bytes):
-        (method, url, version) = data.decode().replace('\n', '').split(' ')
+        (method, url, version) = data.rstrip(b'\r\n').decode().split(' ')
         request = self.generate_request(url=url, method=method, version=version)
+        match = None
         try:
             while True:
                 line = await self.reader.readline()
-                header = line.decode()
-                if header == '\r\n':
+                if line in (b'\r\n', b'\n', b''):
                     break
-                header = header.replace('\r\n', '')
-                splt = header.split(':', maxsplit=1)
-                request.add_header(key=splt[0].strip(), value=splt[1].strip())
-            if request.length:
-                length = request.length
-                size = length if length <= 1000 else 1000
-                content = b''
-                while True:
-                    content += await self.reader.read(size)
-                    length -= size
-                    if length == 0:
-                        break
-                    size = length if length <= 1000 else 1000
-                request.body = content
-            if request.preflight:
-                response = Response(status=204)
-                response.headers.update(self.cors.get_response_headers())
-            else:
-                response = await self.execute_handler(request=request)
+                (key, _, value) = line.partition(b':')
+                request.headers.add(key.strip(), value.strip())
+            match = self.router.match(request.url, request.method)
+            response = await self.execute_headers_hooks(match, request)
+            if response is None:
+                if request.length:
+                    length = request.length
+                    while length:
+                        chunk = await self.reader.read(min(length, 65536))
+                        if not chunk:
+                            raise ConnectionError('Connection closed before the request body was read')
+                        request.feed(chunk)
+                        length -= len(chunk)
+                    request.finish()
+                if not self.writer.get_extra_info('ssl_object') and self.is_h2c_upgrade(request):
+                    await self.upgrade_h2c(request)
+                    return
+                response = await self.execute_handler(request=request, match=match)
+        except MultipartError as e:
+            response = Response({'message': 'Bad Request', 'detail': str(e)}, status=400)
         except Exception as e:
             response = Response({'message': 'Internal Server Error', 'detail': str(e)}, status=500)
-        block = response.render()
-        self.writer.write(block)
-        await self.writer.drain()
+        if request.version in versions:
+            response.version = request.version
+        response.prepare()
+        if response.streaming:
+            await self.write_stream(request, response)
+        else:
+            self.writer.writelines([response.head(), response.body])
+            await self.writer.drain()
         await self.close()
         diff = time.time_ns() - self.ini
         self.print_request(self.start, method, url, response, diff)
+        await self.execute_response_hooks(match, request, response)
+
+    async def write_stream(self, request: Request, response: Response):
+        chunked = request.version != 'HTTP/1.0' and 'Content-Length' not in response.headers
+        if chunked:
+            response.headers['Transfer-Encoding'] = 'chunked'
+        self.writer.write(response.head())
+        try:
+            transport = getattr(self.writer, 'transport', None)
+            if transport and not self.writer.get_extra_info('sslcontext'):
+                await self.writer.drain()
+                if await response.sendfile(transport):
+                    return
+            async for chunk in response.stream():
+                if not chunk:
+                    continue
+                if chunked:
+                    self.writer.writelines([b'%x\r\n' % len(chunk), chunk, b'\r\n'])
+                else:
+                    self.writer.write(chunk)
+                await self.writer.drain()
+        except Exception:
+            traceback.print_exc()
+            return
+        if chunked:
+            self.writer.write(b'0\r\n\r\n')
+        await self.writer.drain()
+
+    @staticmethod
+    def is_h2c_upgrade(request: Request) -> bool:
+        upgrade = [v.strip().lower() for v in request.get_header('Upgrade').split(',')]
+        connection = [v.strip().lower() for v in request.get_header('Connection').split(',')]
+        return (
+            'h2c' in upgrade
+            and 'upgrade' in connection
+            and 'http2-settings' in connection
+            and bool(request.get_header('HTTP2-Settings'))
+        )
+
+    async def upgrade_h2c(self, request: Request):
+        self.writer.write(b'HTTP/1.1 101 Switching Protocols\r\nConnection: Upgrade\r\nUpgrade: h2c\r\n\r\n')
+        await self.writer.drain()
+        del self.app.connections[self.id]
+        conn = self.app.connect(H2Connection, reader=self.reader, writer=self.writer)
+        await conn.upgrade(request, settings=request.get_header('HTTP2-Settings'))
@@ -1,3 +1,4 @@
+import copy
 import enum
 import queue
 import uuid
@@ -135,6 +136,120 @@ static_table_code = {
     'www-authenticate': 61,
 }
 
+pseudo_header_code = {
+    'authority': 1,
+    'method': 2,
+    'path': 4,
+    'scheme': 6,
+    'status': 8,
+}
+
+static_table_values = {
+    'method': ('GET', 'POST'),
+    'path': ('/', '/index.html'),
+    'scheme': ('http', 'https'),
+    'status': (200, 204, 206, 304, 400, 404, 500),
+}
+
+
+def encode_integer(value: int, prefix: int, flags: int) -> bytes:
+    limit = (1 << prefix) - 1
+    if value < limit:
+        return (flags | value).to_bytes(1, 'big', signed=False)
+    ret = (flags | limit).to_bytes(1, 'big', signed=False)
+    value -= limit
+    while value >= 128:
+        ret += (128 + value % 128).to_bytes(1, 'big', signed=False)
+        value //= 128
+    return ret + value.to_bytes(1, 'big', signed=False)
+
+
+def encode_string(value: str) -> bytes:
+    raw = value.encode()
+    huffman = encode_data_ruffman(value)
+    if len(huffman) < len(raw):
+        return encode_integer(len(huffman), prefix=7, flags=0b10000000) + huffman
+    return encode_integer(len(raw), prefix=7, flags=0) + raw
+
+
+class CompressionError(ValueError):
+    ...
+
+
+static_entries: list[tuple[str, str]] = [('', '')]
+for index in range(1, 62):
+    (name, _, value) = static_table[index].partition(':')
+    static_entries.append((f':{name}' if index <= 14 else name, value))
+
+
+def decode_integer(data: bytes, offset: int, prefix: int) -> tuple[int, int]:
+    if offset >= len(data):
+        raise CompressionError('Header block ended inside an integer')
+    limit = (1 << prefix) - 1
+    value = data[offset] & limit
+    offset += 1
+    if value < limit:
+        return value, offset
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise CompressionError('Header block ended inside an integer')
+        byte = data[offset]
+        offset += 1
+        value += (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+        if shift > 28:
+            raise CompressionError('Header block integer too large')
+
+
+def decode_string(data: bytes, offset: int) -> tuple[str, int]:
+    if offset >= len(data):
+        raise CompressionError('Header block ended inside a string')
+    huffman = bool(data[offset] & 0x80)
+    (length, offset) = decode_integer(data, offset, prefix=7)
+    end = offset + length
+    if end > len(data):
+        raise CompressionError('Header block ended inside a string')
+    value = data[offset:end]
+    try:
+        return (decode_huffman_code(value) if huffman else value.decode('latin-1')), end
+    except ValueError as e:
+        raise CompressionError(str(e))
+
+
+class DynamicTable:
+    def __init__(self, max_size: int = 4096):
+        self.entries: deque[tuple[str, str]] = deque()
+        self.size = 0
+        self.max_size = max_size
+        self.limit = max_size
+
+    def get(self, index: int) -> tuple[str, str]:
+        if 0 < index < len(static_entries):
+            return static_entries[index]
+        position = index - len(static_entries)
+        if index <= 0 or position >= len(self.entries):
+            raise CompressionError(f'Header table index {index} out of range')
+        return self.entries[position]
+
+    def add(self, name: str, value: str):
+        self.entries.appendleft((name, value))
+        self.size += len(name) + len(value) + 32
+        self.evict()
+
+    def resize(self, max_size: int):
+        if max_size > self.limit:
+            raise CompressionError(f'Header table size {max_size} above {self.limit}')
+        self.max_size = max_size
+        self.evict()
+
+    def evict(self):
+        while self.size > self.max_size:
+            (name, value) = self.entries.pop()
+            self.size -= len(name) + len(value) + 32
+
 
 class Frame:
     length: int
@@ -173,13 +288,34 @@ class Frame:
 
 class SettingConfig:
     header_table_size = 4096
-    enable_push = 0
+    enable_push = True
     max_concurrent_streams = 0
     initial_window_size = 65535
     max_frame_size = 16384
     max_header_list_size = 0
 
 
+class ErrorCode(enum.IntEnum):
+    NO_ERROR = 0x00
+    PROTOCOL_ERROR = 0x01
+    INTERNAL_ERROR = 0x02
+    FLOW_CONTROL_ERROR = 0x03
+    SETTINGS_TIMEOUT = 0x04
+    STREAM_CLOSED = 0x05
+    FRAME_SIZE_ERROR = 0x06
+    REFUSED_STREAM = 0x07
+    CANCEL = 0x08
+    COMPRESSION_ERROR = 0x09
+    CONNECT_ERROR = 0x0a
+    ENHANCE_YOUR_CALM = 0x0b
+    INADEQUATE_SECURITY = 0x0c
+    HTTP_1_1_REQUIRED = 0x0d
+
+    @classmethod
+    def _missing_(cls, value):
+        return cls.INTERNAL_ERROR
+
+
 class SettingsEnum(enum.Enum):
     SETTINGS_HEADER_TABLE_SIZE = b'\x01'
     SETTINGS_ENABLE_PUSH = b'\x02'
@@ -263,147 +399,70 @@ class HeaderFrame(Frame):
 
     def __init__(self, length: bytes, flags: int, stream: bytes, connection: Any):
         super().__init__(length, flags, stream, connection)
-        self.priority = bool(0b0010000 & self.flags)
+        self.priority = bool(0b00100000 & self.flags)
         self.padded = bool(0b00001000 & self.flags)
         self.end_headers = bool(0b00000100 & self.flags)
         self.end_stream = bool(0b00000001 & self.flags)
+        self.fragment = b''
+        self.header_list_size = 0
 
     def set_payload(self, value: bytes):
-        self.payload = self.decode_payload(value=value)
-
-    def decode_payload(self, value: bytes):
+        if self.padded:
+            value = value[1:len(value) - value[0]]
+        if self.priority:
+            value = value[5:]
+        self.fragment = value
+        if self.end_headers:
+            self.payload = self.decode_payload(value=value)
+
+    def decode_payload(self, value: bytes) -> dict[str, str]:
+        table: DynamicTable = self.connection.dynamic_table
         headers = {}
+        size = 0
         p = 0
-        while True:
-            bc = value[p]
-            if bc == 15:
-                p += 1
-                pc = value[p]
-                bc += pc
-            bits = f'{bin(bc)[2:]:0>8}'
-            mode = bits[:2]
-            code = bits[2:]
-            key_code = int(code, 2)
-            if key_code > 61:
-                key = self.connection.get_dynamic_table_element(key_code)
+        while p < len(value):
+            byte = value[p]
+            if byte & 0x80:
+                (index, p) = decode_integer(value, p, prefix=7)
+                (name, val) = table.get(index)
+            elif byte & 0xc0 == 0x40 or byte & 0xe0 == 0:
+                indexing = bool(byte & 0x40)
+                (index, p) = decode_integer(value, p, prefix=6 if indexing else 4)
+                if index:
+                    (name, _) = table.get(index)
+                else:
+                    (name, p) = decode_string(value, p)
+                (val, p) = decode_string(value, p)
+                if indexing:
+                    table.add(name, val)
             else:
-                key = static_table.get(key_code, '')
-            if mode == '10':
-                if key:
-                    splt = key.split(':')
-                    if len(splt) > 1:
-                        headers[splt[0]] = splt[1]
-                p += 1
+                if headers:
+                    raise CompressionError('Header table size update after a header field')
+                (max_size, p) = decode_integer(value, p, prefix=5)
+                table.resize(max_size)
+                continue
+            size += len(name) + len(val) + 32
+            key = name[1:] if name.startswith(':') else name
+            if key in headers:
+                separator = '; ' if key == 'cookie' else ', '
+                headers[key] = f'{headers[key]}{separator}{val}'
             else:
-                nk = True if not key else False
-                if nk:
-                    p += 1
-                    bs = value[p]
-                    bits_bs = f'{bin(bs)[2:]:0>8}'
-                    mode_bs = bits_bs[:1]
-                    size = int(bits_bs[1:], 2)
-                    p += 1
-                    t = p + size
-                    v = value[p: t]
-                    key = decode_huffman_code(v)
-                    p = t
-                else:
-                    p += 1
-                bs = value[p]
-                bits_bs = f'{bin(bs)[2:]:0>8}'
-                mode_bs = bits_bs[:1]
-                size = int(bits_bs[1:], 2)
-                p += 1
-                t = p + size
-                v = value[p: t]
-                if mode_bs == '0':
-                    if mode == '00':
-                        val_bs = int.from_bytes(v)
-                    else:
-                        val_bs = v.decode()
-                else:
-                    val_bs = decode_huffman_code(v)
-                p = t
-                splt = key.split(':', maxsplit=1)
-                headers[splt[0]] = val_bs
-                if mode == '01':
-                    self.connection.add_dynamic_table_element((key, val_bs))
-            if p >= len(value):
-                break
+                headers[key] = val
+        self.header_list_size = size
         return headers
 
     def encode_payload(self) -> bytes:
         ret = b''
-        dtk = {
-            'status': [200, 204, 206, 304, 400, 404, 500] ,
-            'location': [], 
-            'date': [], 
-            'cache-control': []
-        }
         for k, val in self.payload.items():
             key = k.lower()
-            typo = 64 if isinstance(val, str) else 0
-            if key in dtk and val in dtk[key]:
-                key_val = f'{key}:{val}'
-                typo = 128
-                code = static_table_code.get(key_val, '')
-                ec = (128 + code).to_bytes(1)
-                ret += ec
+            if val in static_table_values.get(key, ()):
+                ret += encode_integer(static_table_code[f'{key}:{val}'], prefix=7, flags=0b10000000)
                 continue
+            if code := static_table_code.get(key) or pseudo_header_code.get(key):
+                ret += encode_integer(code, prefix=4, flags=0)
             else:
-                code = static_table_code.get(key, '')
-            if not code:
-                ec = encode_data_ruffman(key)
-                sz = (0).to_bytes(1, 'big', signed=False)
-                ret += sz
-                sz = (len(ec)).to_bytes(1, 'big', signed=False)
-                ret += sz
-                ret += ec
-            else:
-                if code > 31:
-                    typo = 64
-                    md = (typo + 31).to_bytes(1, 'big', signed=False)
-                    i = code - 31
-                    if i >= 128:
-                        rt = (i % 128).to_bytes(1, 'big', signed=False)
-                        ml = (128 + (i // 128)).to_bytes(1, 'big', signed=False)
-                        md += ml + rt
-                    else:
-                        md += i
-                else:
-                    md = (typo + code).to_bytes(1, 'big', signed=False)
-                ret += md
-            if isinstance(val, str):
-                if len(val) > 5:
-                    ec = encode_data_ruffman(val)
-                    typo = 128
-                else:
-                    ec = val
-                    typo = 0
-                sz = (typo + len(ec)).to_bytes(1, 'big', signed=False)
-                ret += sz
-                ret += ec
-            else:
-                if val < 128:
-                    bv = val.to_bytes(1, 'big', signed=False)
-                    sz = len(bv)
-                    ret += sz.to_bytes(1, 'big', signed=False)
-                    ret += bv
-                else:
-                    pre = val - 31
-                    ret += int(31).to_bytes(1, 'big', signed=False)
-                    if pre < 128:
-                        ret += pre.to_bytes(1, 'big', signed=False)
-                    else:
-                        rst = pre % 128
-                        mul = pre // 128
-                        while mul >= 128:
-                            mul -= 127
-                            ret += (128 + 127).to_bytes(1, 'big', signed=False)
-                        ret += mul.to_bytes(1, 'big', signed=False)
-                        ret += rst.to_bytes(1, 'big', signed=False)
-        if ret:
-            p = self.decode_payload(ret)
+                ret += b'\x00' + encode_string(key)
+            ret += encode_string(str(val))
         return ret
 
     def generate(self) -> bytes:
@@ -448,6 +507,18 @@ class RSTStreamFrame(Frame):
     }
     """
     type = 0x03
+    error_code = ErrorCode.NO_ERROR
+
+    def set_payload(self, value: bytes):
+        self.error_code = ErrorCode(int.from_bytes(value[:4]))
+        self.payload = self.error_code
+
+    def generate(self) -> bytes:
+        enc = self.error_code.to_bytes(4, byteorder='big', signed=False)
+        self.length = len(enc)
+        hea = super().generate()
+        block = hea + enc
+        return block
 
 
 class SettingFrame(Frame):
@@ -472,10 +543,10 @@ class SettingFrame(Frame):
     """
     type = 0x04
     payload_size = 6
-    payload: SettingConfig
+    payload: SettingConfig | dict[SettingsEnum, int]
 
     def set_payload(self, value: bytes):
-        self.payload = SettingConfig()
+        self.payload = copy.copy(getattr(self.connection, 'settings', None) or SettingConfig())
         p = 0
         while p < len(value):
             k = value[p + 1:p + 2]
@@ -491,12 +562,21 @@ class SettingFrame(Frame):
                     self.payload.initial_window_size = int.from_bytes(v)
                 case b'\x05':
                     self.payload.max_frame_size = int.from_bytes(v)
-                case b'\x02':
+                case b'\x06':
                     self.payload.max_header_list_size = int.from_bytes(v)
             p += 6
 
+    def generate(self) -> bytes:
+        enc = b''
+        for key, value in (self.payload or {}).items():
+            enc += b'\x00' + key.value + value.to_bytes(4, byteorder='big', signed=False)
+        self.length = len(enc)
+        hea = super().generate()
+        block = hea + enc
+        return block
+
 
-class PushPromisseFrame(Frame):
+class PushPromisseFrame(HeaderFrame):
     """
     PUSH_PROMISE Frame {
       Length (24),
@@ -518,6 +598,20 @@ class PushPromisseFrame(Frame):
     }'
     """
     type = 0x05
+    promised_stream = 0
+
+    def set_payload(self, value: bytes):
+        if self.padded:
+            value = value[1:len(value) - value[0]]
+        self.promised_stream = int.from_bytes(value[:4], byteorder='big', signed=False) & 0x7fffffff
+        self.fragment = value[4:]
+
+    def generate(self) -> bytes:
+        enc = self.promised_stream.to_bytes(4, byteorder='big', signed=False) + self.encode_payload()
+        self.length = len(enc)
+        hea = Frame.generate(self)
+        block = hea + enc
+        return block
 
 
 class PingFrame(Frame):
@@ -556,6 +650,22 @@ class GoawayFrame(Frame):
     }
     """
     type = 0x07
+    last_stream_id = 0
+    error_code = ErrorCode.NO_ERROR
+
+    def set_payload(self, value: bytes):
+        self.last_stream_id = int.from_bytes(value[:4]) & 0x7fffffff
+        self.error_code = ErrorCode(int.from_bytes(value[4:8]))
+        self.payload = value[8:]
+
+    def generate(self) -> bytes:
+        enc = self.last_stream_id.to_bytes(4, byteorder='big', signed=False)
+        enc += self.error_code.to_bytes(4, byteorder='big', signed=False)
+        enc += self.payload or b''
+        self.length = len(enc)
+        hea = super().generate()
+        block = hea + enc
+        return block
 
 
 class WindowUpdateFrame(Frame):
@@ -576,7 +686,14 @@ class WindowUpdateFrame(Frame):
     type = 0x08
 
     def set_payload(self, value: bytes):
-        self.payload = int.from_bytes(value)
+        self.payload = int.from_bytes(value) & 0x7fffffff
+
+    def generate(self) -> bytes:
+        enc = self.payload.to_bytes(4, byteorder='big', signed=False)
+        self.length = len(enc)
+        hea = super().generate()
+        block = hea + enc
+        return block
 
 
 class ContinuationFrame(Frame):
@@ -596,3 +713,12 @@ class ContinuationFrame(Frame):
     }
     """
     type = 0x09
+    end_headers = False
+
+    def __init__(self, length: bytes, flags: int, stream: bytes, connection: Any):
+        super().__init__(length, flags, stream, connection)
+        self.end_headers = bool(0b00000100 & self.flags)
+        self.fragment = b''
+
+    def set_payload(self, value: bytes):
+        self.fragment = value
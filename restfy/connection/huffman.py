@@ -1,243 +1,302 @@
 from typing import Any
 
-encode = {
-    ' ': '010100',
-    '!': '1111111000',
-    '"': '1111111001',
-    '#': '111111111010',
-    '$': '1111111111001',
-    '%': '010101',
-    '&': '11111000',
-    "'": '11111111010',
-    '(': '1111111010',
-    ')': '1111111011',
-    '*': '11111001',
-    '+': '11111111011',
-    ',': '11111010',
-    '-': '010110',
-    '.': '010111',
-    '/': '011000',
-    '0': '00000',
-    '1': '00001',
-    '2': '00010',
-    '3': '011001',
-    '4': '011010',
-    '5': '011011',
-    '6': '011100',
-    '7': '011101',
-    '8': '011110',
-    '9': '011111',
-    ':': '1011100',
-    ';': '11111011',
-    '<': '111111111111100',
-    '=': '100000',
-    '>': '111111111011',
-    '?': '1111111100',
-    '@': '1111111111010',
-    'A': '100001',
-    'B': '1011101',
-    'C': '1011110',
-    'D': '1011111',
-    'E': '1100000',
-    'F': '1100001',
-    'G': '1100010',
-    'H': '1100011',
-    'I': '1100100',
-    'J': '1100101',
-    'K': '1100110',
-    'L': '1100111',
-    'M': '1101000',
-    'N': '1101001',
-    'O': '1101010',
-    'P': '1101011',
-    'Q': '1101100',
-    'R': '1101101',
-    'S': '1101110',
-    'T': '1101111',
-    'U': '1110000',
-    'V': '1110001',
-    'W': '1110010',
-    'X': '11111100',
-    'Y': '1110011',
-    'Z': '11111101',
-    '[': '1111111111011',
-    '\\': '1111111111111110000',
-    ']': '1111111111100',
-    '^': '11111111111100',
-    '_': '100010',
-    '`': '111111111111101',
-    'a': '00011',
-    'b': '100011',
-    'c': '00100',
-    'd': '100100',
-    'e': '00101',
-    'f': '100101',
-    'g': '100110',
-    'h': '100111',
-    'i': '00110',
-    'j': '1110100',
-    'k': '1110101',
-    'l': '101000',
-    'm': '101001',
-    'n': '101010',
-    'o': '00111',
-    'p': '101011',
-    'q': '1110110',
-    'r': '101100',
-    's': '01000',
-    't': '01001',
-    'u': '101101',
-    'v': '1110111',
-    'w': '1111000',
-    'x': '1111001',
-    'y': '1111010',
-    'z': '1111011',
-    '{': '111111111111110',
-    '|': '11111111100',
-    '}': '11111111111101',
-    '~': '1111111111101',
-}
 
-decode = {
-     '010100': ' ',
-     '1111111000': '!',
-     '1111111001': '"',
-     '111111111010': '#',
-     '1111111111001': '$',
-     '010101': '%',
-     '11111000': '&',
-     '11111111010': "'",
-     '1111111010': '(',
-     '1111111011': ')',
-     '11111001': '*',
-     '11111111011': '+',
-     '11111010': ',',
-     '010110': '-',
-     '010111': '.',
-     '011000': '/',
-     '00000': '0',
-     '00001': '1',
-     '00010': '2',
-     '011001': '3',
-     '011010': '4',
-     '011011': '5',
-     '011100': '6',
-     '011101': '7',
-     '011110': '8',
-     '011111': '9',
-     '1011100': ':',
-     '11111011': ';',
-     '111111111111100': '<',
-     '100000': '=',
-     '111111111011': '>',
-     '1111111100': '?',
-     '1111111111010': '@',
-     '100001': 'A',
-     '1011101': 'B',
-     '1011110': 'C',
-     '1011111': 'D',
-     '1100000': 'E',
-     '1100001': 'F',
-     '1100010': 'G',
-     '1100011': 'H',
-     '1100100': 'I',
-     '1100101': 'J',
-     '1100110': 'K',
-     '1100111': 'L',
-     '1101000': 'M',
-     '1101001': 'N',
-     '1101010': 'O',
-     '1101011': 'P',
-     '1101100': 'Q',
-     '1101101': 'R',
-     '1101110': 'S',
-     '1101111': 'T',
-     '1110000': 'U',
-     '1110001': 'V',
-     '1110010': 'W',
-     '11111100': 'X',
-     '1110011': 'Y',
-     '11111101': 'Z',
-     '1111111111011': '[',
-     '1111111111111110000': '\\',
-     '1111111111100': ']',
-     '11111111111100': '^',
-     '100010': '_',
-     '111111111111101': '`',
-     '00011': 'a',
-     '100011': 'b',
-     '00100': 'c',
-     '100100': 'd',
-     '00101': 'e',
-     '100101': 'f',
-     '100110': 'g',
-     '100111': 'h',
-     '00110': 'i',
-     '1110100': 'j',
-     '1110101': 'k',
-     '101000': 'l',
-     '101001': 'm',
-     '101010': 'n',
-     '00111': 'o',
-     '101011': 'p',
-     '1110110': 'q',
-     '101100': 'r',
-     '01000': 's',
-     '01001': 't',
-     '101101': 'u',
-     '1110111': 'v',
-     '1111000': 'w',
-     '1111001': 'x',
-     '1111010': 'y',
-     '1111011': 'z',
-     '111111111111110': '{',
-     '11111111100': '|',
-     '11111111111101': '}',
-     '1111111111101': '~',
-}
+codes = (
+    (0x1ff8, 13),  # 0
+    (0x7fffd8, 23),  # 1
+    (0xfffffe2, 28),  # 2
+    (0xfffffe3, 28),  # 3
+    (0xfffffe4, 28),  # 4
+    (0xfffffe5, 28),  # 5
+    (0xfffffe6, 28),  # 6
+    (0xfffffe7, 28),  # 7
+    (0xfffffe8, 28),  # 8
+    (0xffffea, 24),  # 9
+    (0x3ffffffc, 30),  # 10
+    (0xfffffe9, 28),  # 11
+    (0xfffffea, 28),  # 12
+    (0x3ffffffd, 30),  # 13
+    (0xfffffeb, 28),  # 14
+    (0xfffffec, 28),  # 15
+    (0xfffffed, 28),  # 16
+    (0xfffffee, 28),  # 17
+    (0xfffffef, 28),  # 18
+    (0xffffff0, 28),  # 19
+    (0xffffff1, 28),  # 20
+    (0xffffff2, 28),  # 21
+    (0x3ffffffe, 30),  # 22
+    (0xffffff3, 28),  # 23
+    (0xffffff4, 28),  # 24
+    (0xffffff5, 28),  # 25
+    (0xffffff6, 28),  # 26
+    (0xffffff7, 28),  # 27
+    (0xffffff8, 28),  # 28
+    (0xffffff9, 28),  # 29
+    (0xffffffa, 28),  # 30
+    (0xffffffb, 28),  # 31
+    (0x14, 6),  # ' '
+    (0x3f8, 10),  # '!'
+    (0x3f9, 10),  # '"'
+    (0xffa, 12),  # '#'
+    (0x1ff9, 13),  # '$'
+    (0x15, 6),  # '%'
+    (0xf8, 8),  # '&'
+    (0x7fa, 11),  # "'"
+    (0x3fa, 10),  # '('
+    (0x3fb, 10),  # ')'
+    (0xf9, 8),  # '*'
+    (0x7fb, 11),  # '+'
+    (0xfa, 8),  # ','
+    (0x16, 6),  # '-'
+    (0x17, 6),  # '.'
+    (0x18, 6),  # '/'
+    (0x0, 5),  # '0'
+    (0x1, 5),  # '1'
+    (0x2, 5),  # '2'
+    (0x19, 6),  # '3'
+    (0x1a, 6),  # '4'
+    (0x1b, 6),  # '5'
+    (0x1c, 6),  # '6'
+    (0x1d, 6),  # '7'
+    (0x1e, 6),  # '8'
+    (0x1f, 6),  # '9'
+    (0x5c, 7),  # ':'
+    (0xfb, 8),  # ';'
+    (0x7ffc, 15),  # '<'
+    (0x20, 6),  # '='
+    (0xffb, 12),  # '>'
+    (0x3fc, 10),  # '?'
+    (0x1ffa, 13),  # '@'
+    (0x21, 6),  # 'A'
+    (0x5d, 7),  # 'B'
+    (0x5e, 7),  # 'C'
+    (0x5f, 7),  # 'D'
+    (0x60, 7),  # 'E'
+    (0x61, 7),  # 'F'
+    (0x62, 7),  # 'G'
+    (0x63, 7),  # 'H'
+    (0x64, 7),  # 'I'
+    (0x65, 7),  # 'J'
+    (0x66, 7),  # 'K'
+    (0x67, 7),  # 'L'
+    (0x68, 7),  # 'M'
+    (0x69, 7),  # 'N'
+    (0x6a, 7),  # 'O'
+    (0x6b, 7),  # 'P'
+    (0x6c, 7),  # 'Q'
+    (0x6d, 7),  # 'R'
+    (0x6e, 7),  # 'S'
+    (0x6f, 7),  # 'T'
+    (0x70, 7),  # 'U'
+    (0x71, 7),  # 'V'
+    (0x72, 7),  # 'W'
+    (0xfc, 8),  # 'X'
+    (0x73, 7),  # 'Y'
+    (0xfd, 8),  # 'Z'
+    (0x1ffb, 13),  # '['
+    (0x7fff0, 19),  # '\\'
+    (0x1ffc, 13),  # ']'
+    (0x3ffc, 14),  # '^'
+    (0x22, 6),  # '_'
+    (0x7ffd, 15),  # '`'
+    (0x3, 5),  # 'a'
+    (0x23, 6),  # 'b'
+    (0x4, 5),  # 'c'
+    (0x24, 6),  # 'd'
+    (0x5, 5),  # 'e'
+    (0x25, 6),  # 'f'
+    (0x26, 6),  # 'g'
+    (0x27, 6),  # 'h'
+    (0x6, 5),  # 'i'
+    (0x74, 7),  # 'j'
+    (0x75, 7),  # 'k'
+    (0x28, 6),  # 'l'
+    (0x29, 6),  # 'm'
+    (0x2a, 6),  # 'n'
+    (0x7, 5),  # 'o'
+    (0x2b, 6),  # 'p'
+    (0x76, 7),  # 'q'
+    (0x2c, 6),  # 'r'
+    (0x8, 5),  # 's'
+    (0x9, 5),  # 't'
+    (0x2d, 6),  # 'u'
+    (0x77, 7),  # 'v'
+    (0x78, 7),  # 'w'
+    (0x79, 7),  # 'x'
+    (0x7a, 7),  # 'y'
+    (0x7b, 7),  # 'z'
+    (0x7ffe, 15),  # '{'
+    (0x7fc, 11),  # '|'
+    (0x3ffd, 14),  # '}'
+    (0x1ffd, 13),  # '~'
+    (0xffffffc, 28),  # 127
+    (0xfffe6, 20),  # 128
+    (0x3fffd2, 22),  # 129
+    (0xfffe7, 20),  # 130
+    (0xfffe8, 20),  # 131
+    (0x3fffd3, 22),  # 132
+    (0x3fffd4, 22),  # 133
+    (0x3fffd5, 22),  # 134
+    (0x7fffd9, 23),  # 135
+    (0x3fffd6, 22),  # 136
+    (0x7fffda, 23),  # 137
+    (0x7fffdb, 23),  # 138
+    (0x7fffdc, 23),  # 139
+    (0x7fffdd, 23),  # 140
+    (0x7fffde, 23),  # 141
+    (0xffffeb, 24),  # 142
+    (0x7fffdf, 23),  # 143
+    (0xffffec, 24),  # 144
+    (0xffffed, 24),  # 145
+    (0x3fffd7, 22),  # 146
+    (0x7fffe0, 23),  # 147
+    (0xffffee, 24),  # 148
+    (0x7fffe1, 23),  # 149
+    (0x7fffe2, 23),  # 150
+    (0x7fffe3, 23),  # 151
+    (0x7fffe4, 23),  # 152
+    (0x1fffdc, 21),  # 153
+    (0x3fffd8, 22),  # 154
+    (0x7fffe5, 23),  # 155
+    (0x3fffd9, 22),  # 156
+    (0x7fffe6, 23),  # 157
+    (0x7fffe7, 23),  # 158
+    (0xffffef, 24),  # 159
+    (0x3fffda, 22),  # 160
+    (0x1fffdd, 21),  # 161
+    (0xfffe9, 20),  # 162
+    (0x3fffdb, 22),  # 163
+    (0x3fffdc, 22),  # 164
+    (0x7fffe8, 23),  # 165
+    (0x7fffe9, 23),  # 166
+    (0x1fffde, 21),  # 167
+    (0x7fffea, 23),  # 168
+    (0x3fffdd, 22),  # 169
+    (0x3fffde, 22),  # 170
+    (0xfffff0, 24),  # 171
+    (0x1fffdf, 21),  # 172
+    (0x3fffdf, 22),  # 173
+    (0x7fffeb, 23),  # 174
+    (0x7fffec, 23),  # 175
+    (0x1fffe0, 21),  # 176
+    (0x1fffe1, 21),  # 177
+    (0x3fffe0, 22),  # 178
+    (0x1fffe2, 21),  # 179
+    (0x7fffed, 23),  # 180
+    (0x3fffe1, 22),  # 181
+    (0x7fffee, 23),  # 182
+    (0x7fffef, 23),  # 183
+    (0xfffea, 20),  # 184
+    (0x3fffe2, 22),  # 185
+    (0x3fffe3, 22),  # 186
+    (0x3fffe4, 22),  # 187
+    (0x7ffff0, 23),  # 188
+    (0x3fffe5, 22),  # 189
+    (0x3fffe6, 22),  # 190
+    (0x7ffff1, 23),  # 191
+    (0x3ffffe0, 26),  # 192
+    (0x3ffffe1, 26),  # 193
+    (0xfffeb, 20),  # 194
+    (0x7fff1, 19),  # 195
+    (0x3fffe7, 22),  # 196
+    (0x7ffff2, 23),  # 197
+    (0x3fffe8, 22),  # 198
+    (0x1ffffec, 25),  # 199
+    (0x3ffffe2, 26),  # 200
+    (0x3ffffe3, 26),  # 201
+    (0x3ffffe4, 26),  # 202
+    (0x7ffffde, 27),  # 203
+    (0x7ffffdf, 27),  # 204
+    (0x3ffffe5, 26),  # 205
+    (0xfffff1, 24),  # 206
+    (0x1ffffed, 25),  # 207
+    (0x7fff2, 19),  # 208
+    (0x1fffe3, 21),  # 209
+    (0x3ffffe6, 26),  # 210
+    (0x7ffffe0, 27),  # 211
+    (0x7ffffe1, 27),  # 212
+    (0x3ffffe7, 26),  # 213
+    (0x7ffffe2, 27),  # 214
+    (0xfffff2, 24),  # 215
+    (0x1fffe4, 21),  # 216
+    (0x1fffe5, 21),  # 217
+    (0x3ffffe8, 26),  # 218
+    (0x3ffffe9, 26),  # 219
+    (0xffffffd, 28),  # 220
+    (0x7ffffe3, 27),  # 221
+    (0x7ffffe4, 27),  # 222
+    (0x7ffffe5, 27),  # 223
+    (0xfffec, 20),  # 224
+    (0xfffff3, 24),  # 225
+    (0xfffed, 20),  # 226
+    (0x1fffe6, 21),  # 227
+    (0x3fffe9, 22),  # 228
+    (0x1fffe7, 21),  # 229
+    (0x1fffe8, 21),  # 230
+    (0x7ffff3, 23),  # 231
+    (0x3fffea, 22),  # 232
+    (0x3fffeb, 22),  # 233
+    (0x1ffffee, 25),  # 234
+    (0x1ffffef, 25),  # 235
+    (0xfffff4, 24),  # 236
+    (0xfffff5, 24),  # 237
+    (0x3ffffea, 26),  # 238
+    (0x7ffff4, 23),  # 239
+    (0x3ffffeb, 26),  # 240
+    (0x7ffffe6, 27),  # 241
+    (0x3ffffec, 26),  # 242
+    (0x3ffffed, 26),  # 243
+    (0x7ffffe7, 27),  # 244
+    (0x7ffffe8, 27),  # 245
+    (0x7ffffe9, 27),  # 246
+    (0x7ffffea, 27),  # 247
+    (0x7ffffeb, 27),  # 248
+    (0xffffffe, 28),  # 249
+    (0x7ffffec, 27),  # 250
+    (0x7ffffed, 27),  # 251
+    (0x7ffffee, 27),  # 252
+    (0x7ffffef, 27),  # 253
+    (0x7fffff0, 27),  # 254
+    (0x3ffffee, 26),  # 255
+    (0x3fffffff, 30),  # EOS
+)
 
+EOS = 256
 
-def decode_huffman_code(val: bytes) -> str:
-    ret = ''
-    bs = ''.join([f'{bin(c)[2:]:0>8}' for c in iter(val)])
-    p = 0
-    s = 5
-    while True:
-        z = p + s
-        if z > len(bs):
-            break
-        b = bs[p:p + s]
-        r = decode.get(b, None)
-        if r:
-            p += s
-            s = 5
-        else:
-            s += 1
-            continue
-        ret += r
-    return ret
+decode = {(length, code): symbol for symbol, (code, length) in enumerate(codes)}
 
 
-def encode_data_ruffman(value: Any) -> bytes:
-    ret = b''
-    if isinstance(value, str):
-        ac = ''
-        for c in value:
-            bts = encode.get(c, '')
-            ac += bts
-            if len(ac) >= 8:
-                pc = ac[:8]
-                ac = ac[8:]
-                ret += int(pc, 2).to_bytes(1, 'big', signed=False)
-        if ac:
-            ac = ac.ljust(8, '1')
-            ret += int(ac, 2).to_bytes(1, 'big', signed=False)
-    else:
-        ...
-    return ret
+def decode_huffman_code(val: bytes) -> str:
+    ret = bytearray()
+    code = 0
+    length = 0
+    for byte in val:
+        for shift in range(7, -1, -1):
+            code = (code << 1) | ((byte >> shift) & 1)
+            length += 1
+            symbol = decode.get((length, code))
+            if symbol is None:
+                if length >= 30:
+                    raise ValueError('Invalid Huffman code')
+                continue
+            if symbol == EOS:
+                raise ValueError('Huffman string with EOS symbol')
+            ret.append(symbol)
+            code = 0
+            length = 0
+    if length > 7 or code != (1 << length) - 1:
+        raise ValueError('Invalid Huffman padding')
+    return ret.decode('latin-1')
 
 
-if __name__ == '__main__':
-    bitstr = decode_huffman_code(b'Manasses Lima')
-    print(bitstr)
-    ec = encode_data_ruffman('manasses lima')
+def encode_data_ruffman(value: Any) -> bytes:
+    data = value.encode() if isinstance(value, str) else bytes(value)
+    bits = 0
+    count = 0
+    for byte in data:
+        (code, length) = codes[byte]
+        bits = (bits << length) | code
+        count += length
+    padding = -count % 8
+    bits = (bits << padding) | ((1 << padding) - 1)
+    return bits.to_bytes((count + padding) // 8, byteorder='big', signed=False)
@@ -0,0 +1,95 @@
+import re
+import uuid
+
+
+class Converter:
+    name = 'str'
+    type: type = str
+    priority = 4
+    greedy = False
+
+    def __init__(self, pattern: str = ''):
+        self.pattern = pattern
+        self.spec = f'{self.name}:{pattern}' if pattern else self.name
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}: {self.spec}'
+
+    def convert(self, value: str):
+        if not value:
+            raise ValueError('Empty path segment')
+        return value
+
+
+class IntConverter(Converter):
+    name = 'int'
+    type = int
+    priority = 0
+    regex = re.compile(r'-?\d+')
+
+    def convert(self, value: str) -> int:
+        if not self.regex.fullmatch(value):
+            raise ValueError(f'"{value}" is not an integer')
+        return int(value)
+
+
+class UUIDConverter(Converter):
+    name = 'uuid'
+    type = uuid.UUID
+    priority = 1
+
+    def convert(self, value: str) -> uuid.UUID:
+        if len(value) != 36:
+            raise ValueError(f'"{value}" is not an uuid')
+        return uuid.UUID(value)
+
+
+class FloatConverter(Converter):
+    name = 'float'
+    type = float
+    priority = 2
+    regex = re.compile(r'-?\d+(\.\d+)?')
+
+    def convert(self, value: str) -> float:
+        if not self.regex.fullmatch(value):
+            raise ValueError(f'"{value}" is not a float')
+        return float(value)
+
+
+class RegexConverter(Converter):
+    name = 're'
+    priority = 3
+
+    def __init__(self, pattern: str = ''):
+        super().__init__(pattern)
+        self.regex = re.compile(pattern)
+
+    def convert(self, value: str) -> str:
+        if not self.regex.fullmatch(value):
+            raise ValueError(f'"{value}" does not match {self.pattern}')
+        return value
+
+
+class PathConverter(Converter):
+    name = 'path'
+    priority = 5
+    greedy = True
+
+    def convert(self, value: str) -> str:
+        return value
+
+
+converters: dict[str, type[Converter]] = {
+    converter.name: converter for converter in (
+        Converter, IntConverter, UUIDConverter, FloatConverter, RegexConverter, PathConverter
+    )
+}
+
+
+def parse_variable(node: str) -> tuple[str, Converter]:
+    (name, _, spec) = node[1:-1].partition(':')
+    (kind, _, pattern) = spec.partition(':')
+    converter = converters.get(kind or 'str')
+    if not converter:
+        raise ValueError(f'Unknown path converter "{kind}" on {node}')
+    return name, converter(pattern)
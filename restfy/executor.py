@@ -0,0 +1,57 @@
+import asyncio
+from .request import Request
+from .response import Response
+
+
+class RequestSnapshot:
+    def __init__(self, request: Request):
+        self.method = request.method
+        self.url = request.url
+        self.version = request.version
+        self.query = request.query
+        self.headers = request.headers.copy()
+        self.body = request.body
+        self.data = request.data
+        self.vars = dict(request.vars)
+        self.params = request.params.copy()
+        self.path_args = dict(request.path_args)
+        self.query_args = request.query_args.copy()
+
+    def restore(self) -> Request:
+        request = Request(method=self.method, version=self.version)
+        request.url = self.url
+        request.query = self.query
+        request.headers = self.headers
+        request.body = self.body
+        request.data = self.data
+        request.vars = self.vars
+        request.params = self.params
+        request.path_args = self.path_args
+        request.query_args = self.query_args
+        return request
+
+
+class ResponseSnapshot:
+    def __init__(self, response: Response):
+        self.data = response.data
+        self.status = response.status
+        self.headers = response.headers
+        self.content_type = response.content_type
+        self.pushes = response.pushes
+
+    def restore(self) -> Response:
+        response = Response(self.data, self.status, content_type=self.content_type, headers=self.headers)
+        for path in self.pushes:
+            response.push(path)
+        return response
+
+
+def run_in_process(func: callable, args: dict, snapshot: RequestSnapshot | None, request_parameter: str):
+    if snapshot:
+        args[request_parameter] = snapshot.restore()
+    ret = func(**args)
+    if asyncio.iscoroutine(ret):
+        ret = asyncio.run(ret)
+    if isinstance(ret, Response):
+        ret = ResponseSnapshot(ret)
+    return ret
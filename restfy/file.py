@@ -1,14 +1,44 @@
+import asyncio
+import shutil
+from typing import BinaryIO
+
+
 class File:
-    def __init__(self, name: str, kind: str, content=None, base64=False):
-        self.content = content
+    def __init__(self, name: str, kind: str, content=None, base64=False, *, stream: BinaryIO | None = None):
+        self._content = content
+        self.stream = stream
         self.name = name
         self.type = kind
         self.base64 = base64
 
-    def save(self, path):
+    @property
+    def content(self) -> bytes | None:
+        if self.stream is None:
+            return self._content
+        self.stream.seek(0)
+        return self.stream.read()
+
+    @content.setter
+    def content(self, value: bytes | None):
+        self._content = value
+        self.stream = None
+
+    async def save(self, path):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write, path)
+
+    def _write(self, path):
         with open(path, 'wb') as f:
-            f.write(self.content)
+            if self.stream is None:
+                f.write(self.content)
+            else:
+                self.stream.seek(0)
+                shutil.copyfileobj(self.stream, f)
 
     def open(self, path):
         with open(path, 'rb') as f:
-            self.content = f.read()
\ No newline at end of file
+            self.content = f.read()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
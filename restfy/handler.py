@@ -1,52 +1,148 @@
+import asyncio
+import decimal
+import functools
+import inspect
+import types
+import typing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 import bike
 from .request import Request
 from .response import Response
+from .middleware import Middleware, create_middleware
+from .conditional import ConditionalMiddleware
+from .query import MultiDict
+from .executor import RequestSnapshot, ResponseSnapshot, run_in_process
+
+
+MISSING = inspect.Parameter.empty
+TRUE_VALUES = {'true', '1', 'yes', 'on'}
+FALSE_VALUES = {'false', '0', 'no', 'off', ''}
+
+
+def parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f'invalid boolean "{value}"')
+
+
+def create_caster(kind) -> callable:
+    if kind is bool:
+        return parse_bool
+    if kind in (int, float, uuid.UUID, decimal.Decimal):
+        def cast(value):
+            return value if type(value) is kind else kind(value)
+        return cast
+    return None
+
+
+class BindError(ValueError):
+    ...
+
+
+def create_binder(name: str, kind) -> callable:
+    origin = typing.get_origin(kind)
+    if origin in (typing.Union, types.UnionType):
+        kinds = [arg for arg in typing.get_args(kind) if arg is not type(None)]
+        kind = kinds[0] if len(kinds) == 1 else str
+        origin = typing.get_origin(kind)
+    many = origin in (list, tuple, set)
+    if many:
+        kind = (typing.get_args(kind) or (str,))[0]
+    cast = create_caster(kind)
+
+    def bind(request: Request, args: dict):
+        value = request.vars.pop(name, MISSING)
+        if value is MISSING:
+            if many and isinstance(request.params, MultiDict):
+                value = request.params.popall(name, MISSING)
+            else:
+                value = request.params.pop(name, MISSING)
+            if value is MISSING:
+                return
+        try:
+            if many:
+                values = value if isinstance(value, list) else [value]
+                value = origin(cast(item) for item in values) if cast else origin(values)
+            elif cast:
+                value = cast(value)
+        except Exception as e:
+            raise BindError(f'Error try cast value "{value}" {name} {kind}: {e}')
+        args[name] = value
+    return bind
 
 
 class Handler:
-    def __init__(self, func: callable):
+    def __init__(
+            self,
+            func: callable,
+            *,
+            push: list[str] | None = None,
+            executor: str = 'default',
+            middlewares: list[type[Middleware] | Middleware] | None = None,
+            etag: bool | str = False
+    ):
         self.func: callable = func
+        self.push: list[str] = push or []
+        self.executor: str = executor
+        self.middlewares: list[Middleware] = [create_middleware(m) for m in middlewares or []]
+        if etag:
+            self.middlewares.append(ConditionalMiddleware(weak=etag == 'weak'))
+        self.is_async: bool = inspect.iscoroutinefunction(func)
         self.func_name: str = func.__name__
         self.variable_name: str = ''
+        self.path_names: tuple[str, ...] = ()
         self.parameters: dict = {}
         self.request_parameter: str = ''
         self.payload_parameter: str = ''
         self.payload_model = None
         self.return_type: type | None = None
-        params = func.__annotations__
-        for name, param in params.items():
-            if issubclass(param, Request):
+        signature = inspect.signature(func, eval_str=True)
+        if signature.return_annotation is not MISSING:
+            self.return_type = signature.return_annotation
+        binders = []
+        for name, param in signature.parameters.items():
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            kind = param.annotation if param.annotation is not MISSING else str
+            if isinstance(kind, type) and issubclass(kind, Request):
                 self.request_parameter = name
-            elif issubclass(param, bike.Model):
+            elif isinstance(kind, type) and issubclass(kind, bike.Model):
                 self.payload_parameter = name
-                self.payload_model = param
-            elif name == 'return':
-                self.return_type = param
+                self.payload_model = kind
             else:
-                self.parameters[name] = param
+                self.parameters[name] = kind
+                binders.append(create_binder(name, kind))
+        self.binders: tuple[callable, ...] = tuple(binders)
 
     async def execute(self, request: Request):
         args = {}
-        for key, kind in self.parameters.items():
-            value = request.vars.pop(key, None) or request.params.pop(key, None)
-            if not value:
-                continue
-            if kind in [int, float, bool]:
-                try:
-                    value = kind(value)
-                except Exception as e:
-                    raise Exception(f'Error try cast value "{value}" {key} {kind}: {e}')
-            args[key] = value
-        if self.request_parameter:
-            args[self.request_parameter] = request
+        for bind in self.binders:
+            bind(request, args)
         if self.payload_parameter:
             instance = self.payload_model(**request.data)
             args[self.payload_parameter] = instance
         try:
-            ret = await self.func(**args)
+            if self.runs_in_process(request):
+                ret = await self.execute_in_process(request, args)
+            else:
+                if self.request_parameter:
+                    args[self.request_parameter] = request
+                if self.is_async:
+                    ret = await self.func(**args)
+                elif request.app:
+                    ret = await request.app.run_in_executor(functools.partial(self.func, **args), executor=self.executor)
+                else:
+                    loop = asyncio.get_running_loop()
+                    ret = await loop.run_in_executor(None, functools.partial(self.func, **args))
             if isinstance(ret, tuple):
                 ret = Response(ret[0], ret[1])
-            elif isinstance(ret, (dict, list, str, int, float, bool)):
+            elif isinstance(ret, (dict, list, str, int, float, bool, bike.Model)):
                 ret = Response(ret)
         except Exception as e:
             data = {
@@ -54,4 +150,19 @@ class Handler:
                 'detail': str(e)
             }
             ret = Response(data, status=400)
+        for path in self.push:
+            ret.push(path)
+        return ret
+
+    def runs_in_process(self, request: Request) -> bool:
+        if self.executor == 'default' or not request.app:
+            return False
+        return isinstance(request.app.get_executor(self.executor), ProcessPoolExecutor)
+
+    async def execute_in_process(self, request: Request, args: dict):
+        snapshot = RequestSnapshot(request) if self.request_parameter else None
+        call = functools.partial(run_in_process, self.func, args, snapshot, self.request_parameter)
+        ret = await request.app.run_in_executor(call, executor=self.executor)
+        if isinstance(ret, ResponseSnapshot):
+            ret = ret.restore()
         return ret
@@ -0,0 +1,84 @@
+from collections.abc import Iterator, Mapping, MutableMapping
+from typing import Any
+
+
+def decode(value: bytes | str) -> str:
+    return value.decode('latin-1') if isinstance(value, bytes) else value
+
+
+class Headers(MutableMapping):
+    __slots__ = ('raw', '_index', 'revision')
+
+    def __init__(self, raw: Mapping | list[tuple[bytes | str, Any]] | None = None):
+        self.raw: list[tuple[bytes | str, bytes | str]] = []
+        self._index: dict[str, list[int]] | None = None
+        self.revision: int = 0
+        if raw:
+            for key, value in raw.items() if isinstance(raw, Mapping) else raw:
+                self.add(key, value)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({[(decode(k), decode(v)) for k, v in self.raw]})'
+
+    @property
+    def index(self) -> dict[str, list[int]]:
+        if self._index is None:
+            index = {}
+            for position, (key, _) in enumerate(self.raw):
+                index.setdefault(decode(key).lower(), []).append(position)
+            self._index = index
+        return self._index
+
+    def add(self, key: bytes | str, value: Any):
+        if not isinstance(value, (bytes, str)):
+            value = str(value)
+        self.raw.append((key, value))
+        self.revision += 1
+        if self._index is not None:
+            self._index.setdefault(decode(key).lower(), []).append(len(self.raw) - 1)
+
+    def getall(self, key: str, default: list | None = None) -> list[str]:
+        positions = self.index.get(key.lower())
+        if not positions:
+            return [] if default is None else default
+        return [decode(self.raw[position][1]) for position in positions]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        positions = self.index.get(key.lower())
+        if not positions:
+            return default
+        return decode(self.raw[positions[0]][1])
+
+    def __getitem__(self, key: str) -> str:
+        positions = self.index.get(key.lower())
+        if not positions:
+            raise KeyError(key)
+        return decode(self.raw[positions[0]][1])
+
+    def __setitem__(self, key: str, value: Any):
+        if key in self:
+            del self[key]
+        self.add(key, value)
+
+    def __delitem__(self, key: str):
+        name = key.lower()
+        if name not in self.index:
+            raise KeyError(key)
+        self.raw = [(k, v) for k, v in self.raw if decode(k).lower() != name]
+        self._index = None
+        self.revision += 1
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and key.lower() in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        for positions in self.index.values():
+            yield decode(self.raw[positions[0]][0])
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def copy(self) -> 'Headers':
+        headers = Headers()
+        headers.raw = list(self.raw)
+        return headers
@@ -1,3 +1,4 @@
+import copy
 from .request import Request
 from .response import Response
 
@@ -13,3 +14,25 @@ class Middleware:
     async def forward(self, request: Request) -> Response:
         response = await self.next.exec(request)
         return response
+
+    async def on_headers(self, request: Request) -> Response | None:
+        return None
+
+    async def on_response(self, request: Request, response: Response):
+        ...
+
+    def hooks(self, name: str) -> list[callable]:
+        if getattr(type(self), name) is getattr(Middleware, name):
+            return []
+        return [getattr(self, name)]
+
+    def bind(self, next) -> 'Middleware':
+        middleware = copy.copy(self)
+        middleware.next = next
+        return middleware
+
+
+def create_middleware(middleware: 'type[Middleware] | Middleware') -> Middleware:
+    if isinstance(middleware, type):
+        middleware = middleware()
+    return middleware
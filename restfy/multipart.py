@@ -0,0 +1,137 @@
+import enum
+from tempfile import SpooledTemporaryFile
+from restfy.file import File
+
+
+class State(enum.Enum):
+    PREAMBLE = 0
+    BOUNDARY = 1
+    HEADERS = 2
+    BODY = 3
+    DONE = 4
+
+
+def parse_disposition(value: str) -> dict[str, str]:
+    params = {}
+    for item in value.split(';')[1:]:
+        if '=' not in item:
+            continue
+        (key, val) = item.split('=', maxsplit=1)
+        params[key.strip().lower()] = val.strip().strip('"')
+    return params
+
+
+class MultipartError(ValueError):
+    ...
+
+
+class MultipartParser:
+    def __init__(
+            self,
+            boundary: str,
+            *,
+            spool_size: int = 1024 * 1024,
+            max_header_size: int = 16384,
+            max_field_size: int = 1024 * 1024
+    ):
+        self.delimiter = b'\r\n--' + boundary.encode()
+        self.spool_size = spool_size
+        self.max_header_size = max_header_size
+        self.max_field_size = max_field_size
+        self.buffer = bytearray(b'\r\n')
+        self.state = State.PREAMBLE
+        self.name = ''
+        self.part: bytearray | File | None = None
+        self.data: dict[str, str] = {}
+        self.files: dict[str, File] = {}
+
+    def feed(self, chunk: bytes):
+        self.buffer += chunk
+        while self.step():
+            ...
+
+    def close(self) -> tuple[dict[str, str], dict[str, File]]:
+        if self.state != State.DONE:
+            raise MultipartError('Multipart body ended before the closing boundary')
+        return self.data, self.files
+
+    def step(self) -> bool:
+        buffer = self.buffer
+        match self.state:
+            case State.PREAMBLE | State.BODY:
+                index = buffer.find(self.delimiter)
+                if index < 0:
+                    keep = len(self.delimiter) - 1
+                    if len(buffer) > keep:
+                        self.write(buffer[:-keep])
+                        del buffer[:-keep]
+                    return False
+                self.write(buffer[:index])
+                del buffer[:index + len(self.delimiter)]
+                self.finish_part()
+                self.state = State.BOUNDARY
+            case State.BOUNDARY:
+                if len(buffer) < 2:
+                    return False
+                if buffer[:2] == b'--':
+                    self.state = State.DONE
+                    buffer.clear()
+                    return False
+                index = buffer.find(b'\r\n')
+                if index < 0:
+                    return False
+                del buffer[:index + 2]
+                self.state = State.HEADERS
+            case State.HEADERS:
+                index = buffer.find(b'\r\n\r\n')
+                if index < 0:
+                    if len(buffer) > self.max_header_size:
+                        raise MultipartError('Multipart part headers too large')
+                    return False
+                self.start_part(bytes(buffer[:index]))
+                del buffer[:index + 4]
+                self.state = State.BODY
+            case State.DONE:
+                buffer.clear()
+                return False
+        return True
+
+    def start_part(self, block: bytes):
+        headers = {}
+        for line in block.decode('latin-1').split('\r\n'):
+            if ':' in line:
+                (key, value) = line.split(':', maxsplit=1)
+                headers[key.strip().lower()] = value.strip()
+        params = parse_disposition(headers.get('content-disposition', ''))
+        self.name = params.get('name', '')
+        if 'filename' in params:
+            kind = headers.get('content-type', 'application/octet-stream')
+            stream = SpooledTemporaryFile(max_size=self.spool_size)
+            self.part = File(name=params['filename'], kind=kind, stream=stream)
+        else:
+            self.part = bytearray()
+
+    def write(self, chunk: bytearray):
+        match self.part:
+            case None:
+                ...
+            case File():
+                self.part.stream.write(chunk)
+            case _:
+                if len(self.part) + len(chunk) > self.max_field_size:
+                    raise MultipartError(f'Multipart field "{self.name}" larger than {self.max_field_size} bytes')
+                self.part += chunk
+
+    def finish_part(self):
+        match self.part:
+            case None:
+                return
+            case File():
+                self.part.stream.seek(0)
+                self.files[self.name] = self.part
+            case _:
+                try:
+                    self.data[self.name] = self.part.decode()
+                except UnicodeDecodeError as e:
+                    raise MultipartError(f'Multipart field "{self.name}" is not valid UTF-8: {e}')
+        self.part = None
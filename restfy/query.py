@@ -0,0 +1,79 @@
+from typing import Any
+from urllib.parse import unquote_plus
+
+
+MISSING = object()
+
+
+class MultiDict(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.multiple: dict[str, list] = {}
+
+    def add(self, key: str, value: Any):
+        if key in self:
+            self.multiple.setdefault(key, [self[key]]).append(value)
+        super().__setitem__(key, value)
+
+    def getall(self, key: str, default: list | None = None) -> list:
+        if key in self.multiple:
+            return list(self.multiple[key])
+        if key in self:
+            return [self[key]]
+        return [] if default is None else default
+
+    def popall(self, key: str, default: Any = MISSING) -> list:
+        if key not in self:
+            if default is MISSING:
+                raise KeyError(key)
+            return default
+        values = self.getall(key)
+        self.pop(key)
+        return values
+
+    def __setitem__(self, key: str, value: Any):
+        self.multiple.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str):
+        self.multiple.pop(key, None)
+        super().__delitem__(key)
+
+    def pop(self, key: str, *args):
+        self.multiple.pop(key, None)
+        return super().pop(key, *args)
+
+    def clear(self):
+        self.multiple.clear()
+        super().clear()
+
+    def __reduce__(self):
+        return MultiDict, (dict(self),), {'multiple': self.multiple}
+
+    def copy(self) -> 'MultiDict':
+        ret = MultiDict(self)
+        ret.multiple = {key: list(values) for key, values in self.multiple.items()}
+        return ret
+
+
+class TooManyFields(ValueError):
+    ...
+
+
+def parse_query(query: str, *, max_fields: int = 1000) -> MultiDict:
+    ret = MultiDict()
+    if not query:
+        return ret
+    pairs = query.split('&')
+    if len(pairs) > max_fields:
+        raise TooManyFields(f'Query string with more than {max_fields} fields')
+    for pair in pairs:
+        if not pair:
+            continue
+        (key, _, value) = pair.partition('=')
+        if '%' in key or '+' in key:
+            key = unquote_plus(key)
+        if '%' in value or '+' in value:
+            value = unquote_plus(value)
+        ret.add(key, value)
+    return ret
@@ -1,6 +1,8 @@
-import json
 import mimetypes
-from restfy.file import File
+from restfy.codec import default_codec
+from restfy.multipart import MultipartParser
+from restfy.query import MultiDict, parse_query
+from restfy.headers import Headers
 
 
 mime_types = {
@@ -43,43 +45,115 @@ class Request:
         self.port = ''
         self.version = version
         self.body = None
-        self.type = ''
         self.query = ''
-        self.length = 0
-        self.headers = {}
-        self.files = {}
-        self.origin = ''
-        self.request_method = ''
-        self.request_headers = ''
-        self.preflight = False
-        self.multipart = False
-        self.boundary = ''
-        self.data = {}
-        self.query_args: dict = {}
-        self.params: dict = {}
+        self.headers = Headers()
+        self._files = {}
+        self._data = None
+        self.chunks: list[bytes] = []
+        self.parser: MultipartParser | None = None
+        self._query_args: MultiDict | None = None
+        self._params: MultiDict | None = None
+        self._content_type: tuple[Headers, int, str, dict[str, str]] | None = None
         self.path_args: dict = {}
         self.vars: dict = {}
 
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = self.decode_data()
+        return self._data
+
+    @data.setter
+    def data(self, value: dict):
+        self._data = value
+
+    @property
+    def query_args(self) -> MultiDict:
+        if self._query_args is None:
+            self._query_args = parse_query(self.query, max_fields=self.max_fields)
+        return self._query_args
+
+    @query_args.setter
+    def query_args(self, value: dict):
+        self._query_args = value
+
+    @property
+    def params(self) -> MultiDict:
+        if self._params is None:
+            self._params = self.query_args.copy()
+        return self._params
+
+    @params.setter
+    def params(self, value: dict):
+        self._params = value
+
+    @property
+    def max_fields(self) -> int:
+        return self.app.max_query_fields if self.app else 1000
+
+    @property
+    def files(self) -> dict:
+        if self._data is None and self.type == 'form-data':
+            self._data = self.decode_data()
+        return self._files
+
+    @files.setter
+    def files(self, value: dict):
+        self._files = value
+
+    def _parse_content_type(self) -> tuple[str, dict[str, str]]:
+        headers = self.headers
+        cached = self._content_type
+        if cached is None or cached[0] is not headers or cached[1] != headers.revision:
+            (value, *params) = headers.get('Content-Type', '').split(';')
+            value = value.strip().lower()
+            options = {}
+            for param in params:
+                (key, _, val) = param.partition('=')
+                options[key.strip().lower()] = val.strip().strip('"')
+            kind = mime_types.get(value, 'plain') if value else ''
+            cached = self._content_type = (headers, headers.revision, kind, options)
+        return cached[2], cached[3]
+
+    @property
+    def type(self) -> str:
+        (kind, _) = self._parse_content_type()
+        return kind
+
+    @property
+    def multipart(self) -> bool:
+        return self.type == 'form-data'
+
+    @property
+    def boundary(self) -> str:
+        (_, options) = self._parse_content_type()
+        return options.get('boundary', '')
+
+    @property
+    def length(self) -> int:
+        return int(self.headers.get('Content-Length') or 0)
+
+    @property
+    def origin(self) -> str:
+        return self.headers.get('Origin', '')
+
+    @property
+    def preflight(self) -> bool:
+        return bool(self.origin) and self.method == 'OPTIONS'
+
+    @property
+    def request_method(self) -> str:
+        return self.headers.get('Access-Control-Request-Method', '')
+
+    @property
+    def request_headers(self) -> str:
+        return self.headers.get('Access-Control-Request-Headers', '')
+
     def add_header(self, key, value):
-        self.headers[key] = value
-        match key.lower():
-            case 'content-type':
-                if 'multipart/form-data' in value:
-                    self.multipart = True
-                    (content, boundary) = value.split(';')
-                    self.type = content.strip()
-                    self.boundary = boundary.replace('boundary=', '').strip()
-                else:
-                    self.type = mime_types.get(value, 'plain')
-            case 'content-length':
-                self.length = int(value)
-            case 'origin':
-                self.origin = value
-                self.preflight = True if self.method == 'OPTIONS' else False
-            case 'access-control-request-method':
-                self.request_method = value
-            case 'access-control-request-headers':
-                self.request_headers = value
+        self.headers.add(key, value)
+
+    def get_header(self, key: str, default: str = '') -> str:
+        return self.headers.get(key, default)
 
     def dict(self):
         return self.decode_data()
@@ -87,7 +161,8 @@ class Request:
     def decode_data(self):
         if self.body:
             if self.type == 'json':
-                return json.loads(self.body)
+                codec = self.app.codec if self.app else default_codec
+                return codec.decode(self.body)
             elif self.type == 'form-data':
                 return self._process_form_data()
             elif self.type == 'x-www-form-urlencoded':
@@ -95,43 +170,41 @@ class Request:
         return {}
 
     def args(self):
-        args = {}
-        if self.query:
-            pairs = self.query.split('&')
-            for pair in pairs:
-                (key, value) = pair.split('=')
-                args[key] = value
-        return args
+        return parse_query(self.query, max_fields=self.max_fields)
 
     def prepare_data(self):
         self.data = self.decode_data()
 
+    def create_parser(self) -> MultipartParser:
+        if not self.app:
+            return MultipartParser(self.boundary)
+        return MultipartParser(
+            self.boundary,
+            spool_size=self.app.multipart_spool_size,
+            max_field_size=self.app.multipart_max_field_size
+        )
+
+    def feed(self, chunk: bytes):
+        if self.multipart:
+            if self.parser is None:
+                self.parser = self.create_parser()
+            self.parser.feed(chunk)
+        else:
+            self.chunks.append(chunk)
+
+    def finish(self):
+        if self.parser is not None:
+            (self._data, self._files) = self.parser.close()
+            self.parser = None
+        else:
+            self.body = b''.join(self.chunks)
+        self.chunks = []
+
     def _process_form_data(self):
-        data = {}
-        parts = self.body.split(f'--{self.boundary}'.encode())
-        for part in parts:
-            if not part or part == b'--\r\n':
-                continue
-            if b'filename=' in part:
-                splt = part.split(b';', maxsplit=2)
-                key = splt[1].decode().strip()[6:-1]
-                (info, content) = splt[2].split(b'\r\n\r\n', maxsplit=1)
-                (filename, kind) = info.decode().split('\r\n')
-                filename = filename.strip()[10:-1]
-                kind = kind.strip()[14:]
-                file = File(name=filename, kind=kind, content=content)
-                self.files[key] = file
-            else:
-                splt = part.split(b';')
-                key, value = splt[1].split(b'\r\n\r\n')
-                key = key.decode().replace('name=', '').strip()[1:-1]
-                data[key] = value.strip().decode()
+        parser = self.create_parser()
+        parser.feed(self.body)
+        (data, self._files) = parser.close()
         return data
 
     def _url_decoded_data(self):
-        data = {}
-        pairs = self.body.decode().split('&')
-        for pair in pairs:
-            (key, value) = pair.split('=')
-            data[key] = value
-        return data
+        return parse_query(self.body.decode(), max_fields=self.max_fields)
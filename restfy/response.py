@@ -1,7 +1,9 @@
-import json
-import datetime
-import decimal
+import asyncio
+import email.utils
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
 from typing import Any
+from .codec import Codec, JSONEncoder, default_codec
 
 status_title = {
     101: 'Switching Protocols',
@@ -12,6 +14,12 @@ status_title = {
     204: 'NO CONTENT',
     205: 'RESET CONTENT',
     206: 'PARTIAL CONTENT',
+    301: 'MOVED PERMANENTLY',
+    302: 'FOUND',
+    303: 'SEE OTHER',
+    304: 'NOT MODIFIED',
+    307: 'TEMPORARY REDIRECT',
+    308: 'PERMANENT REDIRECT',
     400: 'BAD REQUEST',
     401: 'UNAUTHORIZED',
     402: 'PAYMENT REQUIRED',
@@ -23,6 +31,15 @@ status_title = {
     408: 'REQUEST TIMEOUT',
     409: 'CONFLIT',
     410: 'GONE',
+    411: 'LENGTH REQUIRED',
+    412: 'PRECONDITION FAILED',
+    413: 'PAYLOAD TOO LARGE',
+    414: 'URI TOO LONG',
+    415: 'UNSUPPORTED MEDIA TYPE',
+    416: 'RANGE NOT SATISFIABLE',
+    422: 'UNPROCESSABLE ENTITY',
+    429: 'TOO MANY REQUESTS',
+    431: 'REQUEST HEADER FIELDS TOO LARGE',
     500: 'INTERNAL SERVER ERROR',
     501: 'NOT IMPLEMENTED',
     502: 'BAD GATEWAY',
@@ -30,22 +47,82 @@ status_title = {
     504: 'GATEWAY TIMEOUT',
     505: 'HTTP VERSION NOT SUPORTED'
 }
+versions = ('HTTP/1.0', 'HTTP/1.1')
+status_lines: dict[tuple[str, int], bytes] = {
+    (version, status): f'{version} {status} {title}\r\n'.encode()
+    for version in versions
+    for status, title in status_title.items()
+}
+
+
+def status_line(version: str, status: int) -> bytes:
+    line = status_lines.get((version, status))
+    if line is None:
+        title = status_title.get(status, 'STATUS WITHOUT TITLE')
+        line = f'{version} {status} {title}\r\n'.encode()
+    return line
+
+
+class HTTPDate:
+    def __init__(self):
+        self.value = ''
+        self.second = 0
+        self.timer: asyncio.TimerHandle | None = None
+
+    def get(self) -> str:
+        if self.timer is None:
+            now = int(time.time())
+            if now != self.second:
+                self.refresh(now)
+        return self.value
+
+    def refresh(self, now: int):
+        self.second = now
+        self.value = email.utils.formatdate(now, usegmt=True)
+
+    def start(self):
+        if self.timer is None:
+            self.tick()
+
+    def tick(self):
+        now = time.time()
+        self.refresh(int(now))
+        loop = asyncio.get_running_loop()
+        self.timer = loop.call_later(1 - now % 1, self.tick)
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+http_date = HTTPDate()
+header_fragments: dict[str, bytes] = {}
+binary_signatures = (
+    (b'%PDF', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'\x1f\x8b', 'application/gzip'),
+)
 
 
-class JSONEncoder(json.JSONEncoder):
-    def default(self, o: Any) -> Any:
-        if hasattr(o, "dict"):
-            return self.default(o.dict())
-        if isinstance(o, datetime.date):
-            return o.strftime('%Y-%m-%d')
-        if isinstance(o, datetime.datetime):
-            return o.isoformat()
-        if isinstance(o, decimal.Decimal):
-            return float(o)
-        return o
+def header_fragment(name: str) -> bytes:
+    fragment = header_fragments.get(name)
+    if fragment is None:
+        fragment = f'{name}: '.encode()
+        if len(header_fragments) < 1024:
+            header_fragments[name] = fragment
+    return fragment
 
 
 class Response:
+    codec: Codec = default_codec
+    server: str = 'restfy'
+    streaming: bool = False
+
     def __init__(
             self,
             data: Any = None,
@@ -59,45 +136,156 @@ class Response:
         self.data = data if status != 204 else None
         self.headers = {}
         self.content_type = content_type
-        self._prepare_headers(headers)
+        self.pushes: list[str] = []
+        self.prepared = False
         self.content = b''
         self.text = ''
         self.body = b''
+        if self.content_type:
+            self.headers['Content-Type'] = self.content_type
+        self.headers.update(headers or {})
 
     def render(self) -> bytes:
-        title = status_title.get(self.status, 'STATUS WITHOUT TITLE')
-        headers = '\r\n'.join([f"{k}:{v}" for k, v in self.headers.items()])
-        body = self.data
-        content = f'{self.version} {self.status} {title}\r\n{headers}\r\n\r\n'
+        self.prepare()
+        return self.head() + self.body
+
+    def head(self) -> bytes:
+        lines = [status_line(self.version, self.status)]
+        for key, value in self.headers.items():
+            lines.append(header_fragment(key))
+            lines.append(str(value).encode())
+            lines.append(b'\r\n')
+        lines.append(b'\r\n')
+        return b''.join(lines)
+
+    def prepare(self, body: bool = True):
+        if self.prepared:
+            return
+        self.prepared = True
+        self.prepare_headers()
+        data = self.data
+        if data is None:
+            data = b''
+        if isinstance(data, bytes):
+            self._identify_binary_data(data)
+        elif isinstance(data, str):
+            self.headers.setdefault('Content-Type', 'text/plain')
+            data = data.encode() if body else b''
+        else:
+            self.headers.setdefault('Content-Type', self.codec.content_type)
+            data = self.codec.encode(data) if body else b''
         if body:
-            content = f'{content}{body}'
-            self.content = body.encode()
-        return content.encode()
+            self.body = data
+            self.content = data
+            if self.status not in (204, 304):
+                self.headers['Content-Length'] = len(data)
+
+    def set_etag(self, version: Any, weak: bool = False):
+        etag = f'"{version}"'
+        self.headers['ETag'] = f'W/{etag}' if weak else etag
+
+    def prepare_headers(self):
+        self.headers.setdefault('Date', http_date.get())
+        if self.server:
+            self.headers.setdefault('Server', self.server)
+
+    def push(self, path: str):
+        if path not in self.pushes:
+            self.pushes.append(path)
 
     def parser(self, model: Any = None):
-        res = json.loads(self.data)
+        res = self.codec.decode(self.body)
         if model:
             res = model(**res)
         return res
 
-    def _prepare_headers(self, headers):
-        if not headers:
-            headers = {}
-        if self.data is None:
-            self.data = ''
-        if self.content_type:
-            self.headers['Content-Type'] = self.content_type
-        if isinstance(self.data, dict) or isinstance(self.data, list):
-            self.data = json.dumps(self.data, cls=JSONEncoder)
-            self.headers['Content-Type'] = 'application/json'
-        elif isinstance(self.data, bytes):
-            self._identify_binary_data()
-        elif isinstance(self.data, str):
-            self.headers['Content-Type'] = 'text/plain'
-        self.body = self.data.encode()
-        self.headers['Content-Length'] = len(self.data)
-        self.headers.update(headers)
-
-    def _identify_binary_data(self):
-        if self.data[1:4] == 'PDF':
-            self.headers['Content-Type'] = 'application/pdf'
+    def _identify_binary_data(self, data: bytes):
+        for signature, content_type in binary_signatures:
+            if data.startswith(signature):
+                self.headers.setdefault('Content-Type', content_type)
+                return
+        if data:
+            self.headers.setdefault('Content-Type', 'application/octet-stream')
+
+
+class StreamingResponse(Response):
+    def __init__(
+            self,
+            content: Iterable | AsyncIterable,
+            status: int = 200,
+            *,
+            content_type: str = 'application/octet-stream',
+            headers: dict = None
+    ):
+        super().__init__(None, status, content_type=content_type, headers=headers)
+        self.iterable = content
+        self.streaming = True
+        self.filters: list[callable] = []
+
+    def prepare(self, body: bool = True):
+        if self.prepared:
+            return
+        self.prepared = True
+        self.prepare_headers()
+        if not body:
+            self.streaming = False
+
+    async def sendfile(self, transport: asyncio.Transport) -> bool:
+        return False
+
+    async def iterate(self) -> AsyncIterator:
+        if isinstance(self.iterable, AsyncIterable):
+            async for item in self.iterable:
+                yield item
+        else:
+            for item in self.iterable:
+                yield item
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        chunks = self.chunks()
+        for wrap in self.filters:
+            chunks = wrap(chunks)
+        async for chunk in chunks:
+            yield chunk
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        async for item in self.iterate():
+            yield item.encode() if isinstance(item, str) else item
+
+
+class StreamingJSONResponse(StreamingResponse):
+    def __init__(
+            self,
+            items: Iterable | AsyncIterable,
+            status: int = 200,
+            *,
+            ndjson: bool = False,
+            chunk_size: int = 16384,
+            headers: dict = None
+    ):
+        super().__init__(items, status, content_type='', headers=headers)
+        self.ndjson = ndjson
+        self.chunk_size = chunk_size
+
+    def prepare(self, body: bool = True):
+        content_type = 'application/x-ndjson' if self.ndjson else self.codec.content_type
+        self.headers.setdefault('Content-Type', content_type)
+        super().prepare(body)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        (separator, end) = (b'\n', b'') if self.ndjson else (b',', b']')
+        buffer = bytearray() if self.ndjson else bytearray(b'[')
+        first = True
+        async for item in self.iterate():
+            if not self.ndjson and not first:
+                buffer += separator
+            buffer += self.codec.encode(item)
+            if self.ndjson:
+                buffer += separator
+            first = False
+            if len(buffer) >= self.chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += end
+        if buffer:
+            yield bytes(buffer)
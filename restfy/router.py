@@ -1,15 +1,50 @@
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple
 from restfy.request import Request
+from restfy.response import Response
 from restfy.handler import Handler
+from restfy.middleware import Middleware, create_middleware
+from restfy.converter import Converter, parse_variable
+
+
+class Endpoint:
+    def __init__(self, route: 'Route', handler: Handler):
+        self.route = route
+        self.handler = handler
+
+    async def exec(self, request: Request) -> Response:
+        if not (self.route.prepare_data and request.app.prepare_request_data):
+            request.data = {}
+        response = await self.handler.execute(request)
+        response.codec = request.app.codec
+        return response
+
+
+class Match(NamedTuple):
+    route: 'Route'
+    handler: Handler | None
+    args: Mapping[str, Any]
+    pipeline: Middleware | Endpoint | None = None
+    on_headers: tuple[callable, ...] = ()
+    on_response: tuple[callable, ...] = ()
+
+    async def exec(self, request: Request) -> Response:
+        for key, value in self.args.items():
+            request.path_args[key] = value
+            request.vars[key] = value
+        return await self.pipeline.exec(request)
 
 
 class Route:
     def __init__(self, name='', node='', path=None, handle=None, method='', prepare_data=True, websocket=False):
-        self.properties = {}
         self.handlers = {}
+        self.allow = ''
         self.routes = {}
-        self.variable = None
+        self.variables: list[Route] = []
         self.is_variable = False
         self.variable_type = str
+        self.converter: Converter | None = None
         self.name = name
         self.prepare_data: bool = prepare_data
         self.is_websocket = websocket
@@ -17,51 +52,67 @@ class Route:
     def __repr__(self):
         return f'{self.__class__}: {self.name}'
 
-    def add_node(self, path, handle, method='GET', websocket=False):
-        handler = Handler(handle)
+    def add_node(self, path, handle, method='GET', websocket=False, names=(), **options):
         node = path.pop(0)
         if websocket:
             method = 'GET'
         if node.startswith('{'):
-            name = node[1:-1]
-            if self.variable:
-                handler.variable_name = name
-                route = self.variable
-            else:
-                route = Route(websocket=websocket)
-                route.is_variable = True
-                route.name = name
-                self.variable = route
+            route = self.add_variable(node, websocket=websocket)
+            if path and route.converter.greedy:
+                raise ValueError(f'Path variable {node} must be the last node')
+            names = (*names, parse_variable(node)[0])
         else:
             route = self.routes.get(node, Route(websocket=websocket))
             route.name = node
             self.routes[node] = route
         if path:
-            route.add_node(path=path, handle=handle, method=method, websocket=websocket)
+            route.add_node(path=path, handle=handle, method=method, websocket=websocket, names=names, **options)
         else:
-            # handlers = route.handlers if route.is_variable else self.handlers
-            route.handlers[method] = handler
-            # handlers[method] = handler
-            ...
+            handler = Handler(handle, **options)
+            handler.path_names = names
+            route.set_handler(method, handler)
 
-    def add_handler(self, func, method: str):
-        handler = Handler(func)
-        self.handlers[method] = handler
+    def add_variable(self, node: str, route: 'Route | None' = None, websocket: bool = False) -> 'Route':
+        (name, converter) = parse_variable(node)
+        if route is None:
+            for variable in self.variables:
+                if variable.converter.spec == converter.spec:
+                    return variable
+            route = Route(websocket=websocket)
+        route.name = name
+        route.is_variable = True
+        route.converter = converter
+        route.variable_type = converter.type
+        self.variables.append(route)
+        self.variables.sort(key=lambda r: r.converter.priority)
+        return route
 
-    async def exec(self, request: Request):
-        handler = self.handlers[request.method]
-        if self.prepare_data and request.app.prepare_request_data:
-            request.prepare_data()
-        for key, value in self.properties.items():
-            request.path_args[key] = value
-            request.vars[key] = value
-        return await handler.execute(request)
+    def add_handler(self, func, method: str, **options):
+        handler = Handler(func, **options)
+        self.set_handler(method, handler)
+
+    def set_handler(self, method: str, handler: Handler):
+        self.handlers[method] = handler
+        methods = set(self.handlers) | {'OPTIONS'}
+        if 'GET' in methods:
+            methods.add('HEAD')
+        self.allow = ', '.join(sorted(methods))
 
 
 class Router(Route):
-    def __init__(self, base_url=''):
+    def __init__(self, base_url='', cache_size=0):
         super().__init__()
         self.base_url = base_url
+        self.owners: list[Router] = []
+        self.middlewares: list[Middleware] = []
+        self.static: dict[str, Route] | None = None
+        self.pipelines: dict[Handler, Middleware | Endpoint] = {}
+        self.hooks: dict[Handler, tuple[tuple, tuple]] = {}
+        self.path_names: dict[Handler, tuple[str, ...]] = {}
+        self.cache_size: int = cache_size
+        self.cache: OrderedDict[tuple[str, str], Match] = OrderedDict()
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
 
     def add_route(
             self,
@@ -69,117 +120,197 @@ class Router(Route):
             handle: callable,
             *,
             method: str = 'GET',
-            websocket: bool = False
+            websocket: bool = False,
+            **options
     ):
         path = path[1:].split('/')
         if len(path) == 1 and path[0] == '':
-            self.add_handler(handle, method)
+            self.add_handler(handle, method, **options)
         else:
-            self.add_node(path=path, handle=handle, method=method, websocket=websocket)
+            self.add_node(path=path, handle=handle, method=method, websocket=websocket, **options)
+        self.invalidate()
 
     def register_router(self, path, router):
         nodes = path[1:].split('/')
         if len(nodes) == 1 and nodes[0] == '':
             self.handlers = router.handlers
+            self.allow = router.allow
             self.routes = router.routes
-            self.variable = router.variable
+            self.variables = router.variables
             self.is_variable = router.is_variable
+            self.middlewares.extend(router.middlewares)
         else:
-            routes = self.routes
-            while True:
-                node = nodes.pop(0)
-                if len(nodes) == 0:
-                    routes[node] = router
-                    break
-                elif node.startswith('{'):
-                    if self.variable:
-                        route = self.variable
-                    else:
-                        route = Route()
-                        route.is_variable = True
-                        route.name = node[1:-1]
-                        self.variable = route
-                        routes = route.routes
-                else:
-                    if node in routes:
-                        if routes[node].routes:
-                            routes = routes[node].routes
-                        else:
-                            routes = routes[node].variable
-                    else:
-                        routes[node] = Router()
-                        routes = routes[node].routes
-
-    def match(self, url, method):
-        nodes = url[1:].split('/')
-        if len(nodes) == 1 and nodes[0] == '':
-            return self
-        routes = self.routes
-        variable = self.variable
-        args = {}
-        route = None
-        while len(nodes) > 0:
-            node = nodes.pop(0)
-            route = routes.get(node, None)
-            if not route:
-                if variable:
-                    route = variable
-                    args[route.name] = node
+            route = self
+            for node in nodes[:-1]:
+                if node.startswith('{'):
+                    route = route.add_variable(node)
                 else:
-                    break
-            routes = route.routes
-            variable = route.variable
-        if route:
-            if method in route.handlers:
-                route.properties = args
+                    route = route.routes.setdefault(node, Route(name=node))
+            node = nodes[-1]
+            if node.startswith('{'):
+                route.add_variable(node, route=router)
             else:
-                route = None
-        return route
+                router.name = node
+                route.routes[node] = router
+        router.owners.append(self)
+        self.invalidate()
 
-    def get(self, path):
-        def wrapper(func):
-            self.add_route(path, handle=func)
-            return func
-        return wrapper
+    def register_middleware(self, middleware: type[Middleware] | Middleware):
+        self.middlewares.append(create_middleware(middleware))
+        self.invalidate()
 
-    def post(self, path):
-        def wrapper(func):
-            self.add_route(path, handle=func, method='POST')
-            return func
-        return wrapper
+    def invalidate(self):
+        self.static = None
+        self.pipelines = {}
+        self.hooks = {}
+        self.path_names = {}
+        self.cache.clear()
+        for owner in self.owners:
+            owner.invalidate()
 
-    def put(self, path):
-        def wrapper(func):
-            self.add_route(path, handle=func, method='PUT')
-            return func
-        return wrapper
+    def compile(self):
+        static = {}
+        pipelines = {}
+        hooks = {}
+        path_names = {}
+        nodes = [('', self, tuple(self.middlewares), True, ())]
+        while nodes:
+            (path, route, middlewares, is_static, names) = nodes.pop()
+            if route is not self and isinstance(route, Router):
+                middlewares = (*middlewares, *route.middlewares)
+            if route.handlers and is_static:
+                static[path or '/'] = route
+            for handler in route.handlers.values():
+                chain = (*middlewares, *handler.middlewares)
+                pipeline = Endpoint(route, handler)
+                for middleware in reversed(chain):
+                    pipeline = middleware.bind(pipeline)
+                pipelines[handler] = pipeline
+                path_names[handler] = (*names[:len(names) - len(handler.path_names)], *handler.path_names)
+                hooks[handler] = (
+                    tuple(hook for middleware in chain for hook in middleware.hooks('on_headers')),
+                    tuple(hook for middleware in reversed(chain) for hook in middleware.hooks('on_response'))
+                )
+            for name, child in route.routes.items():
+                nodes.append((f'{path}/{name}', child, middlewares, is_static, names))
+            for child in route.variables:
+                nodes.append((path, child, middlewares, False, (*names, child.name)))
+        self.pipelines = pipelines
+        self.hooks = hooks
+        self.path_names = path_names
+        self.static = static
 
-    def delete(self, path):
-        def wrapper(func):
-            self.add_route(path, handle=func, method='DELETE')
-            return func
-        return wrapper
+    def match(self, url, method) -> Match | None:
+        if not self.cache_size:
+            return self.resolve(url, method)
+        key = (method, url)
+        if (match := self.cache.get(key)) is not None:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+            return match
+        self.cache_misses += 1
+        match = self.resolve(url, method)
+        if match is not None:
+            self.cache[key] = match
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return match
 
-    def patch(self, path):
-        def wrapper(func):
-            self.add_route(path, handle=func, method='PATCH')
-            return func
-        return wrapper
+    def resolve(self, url, method) -> Match | None:
+        if self.static is None:
+            self.compile()
+        route = self.static.get(url)
+        values = []
+        if route is None or not self.accepts(route, method):
+            nodes = url[1:].split('/')
+            found = self.walk(self, nodes, 0, method)
+            if found is None and route is None:
+                found = self.walk(self, nodes, 0)
+            if found is not None:
+                (route, values) = found
+                values.reverse()
+            elif route is None:
+                return None
+        handler = route.handlers.get(method)
+        if handler is None and method == 'HEAD':
+            handler = route.handlers.get('GET')
+        if names := self.path_names.get(handler):
+            args = dict(zip(names, (value for _, value in values)))
+        else:
+            args = dict(values)
+        pipeline = self.pipelines.get(handler)
+        (on_headers, on_response) = self.hooks.get(handler, ((), ()))
+        return Match(
+            route=route,
+            handler=handler,
+            args=MappingProxyType(args),
+            pipeline=pipeline,
+            on_headers=on_headers,
+            on_response=on_response
+        )
 
-    def options(self, path):
-        def wrapper(func):
-            self.add_route(path, handle=func, method='OPTIONS')
-            return func
-        return wrapper
+    @staticmethod
+    def accepts(route: Route, method: str | None) -> bool:
+        if method is None:
+            return bool(route.handlers)
+        return method in route.handlers or (method == 'HEAD' and 'GET' in route.handlers)
 
-    def head(self, path):
-        def wrapper(func):
-            self.add_route(path, handle=func, method='HEAD')
-            return func
-        return wrapper
+    @classmethod
+    def walk(
+            cls,
+            route: Route,
+            nodes: list[str],
+            index: int,
+            method: str | None = None
+    ) -> tuple[Route, list[tuple[str, Any]]] | None:
+        if index == len(nodes):
+            return (route, []) if cls.accepts(route, method) else None
+        node = nodes[index]
+        if (child := route.routes.get(node)) is not None:
+            if found := cls.walk(child, nodes, index + 1, method):
+                return found
+        for variable in route.variables:
+            converter = variable.converter
+            try:
+                if converter.greedy:
+                    value = converter.convert('/'.join(nodes[index:]))
+                    found = (variable, []) if cls.accepts(variable, method) else None
+                else:
+                    value = converter.convert(node)
+                    found = cls.walk(variable, nodes, index + 1, method)
+            except ValueError:
+                continue
+            if found:
+                found[1].append((variable.name, value))
+                return found
+        return None
 
-    def websocket(self, path):
+    def route(self, path, method='GET', *, websocket=False, **options):
         def wrapper(func):
-            self.add_route(path, handle=func, method='GET', websocket=True)
+            self.add_route(path, handle=func, method=method, websocket=websocket, **options)
             return func
         return wrapper
+
+    def get(self, path, **options):
+        return self.route(path, **options)
+
+    def post(self, path, **options):
+        return self.route(path, method='POST', **options)
+
+    def put(self, path, **options):
+        return self.route(path, method='PUT', **options)
+
+    def delete(self, path, **options):
+        return self.route(path, method='DELETE', **options)
+
+    def patch(self, path, **options):
+        return self.route(path, method='PATCH', **options)
+
+    def options(self, path, **options):
+        return self.route(path, method='OPTIONS', **options)
+
+    def head(self, path, **options):
+        return self.route(path, method='HEAD', **options)
+
+    def websocket(self, path, **options):
+        return self.route(path, websocket=True, **options)
@@ -0,0 +1,54 @@
+import datetime
+import decimal
+import uuid
+from typing import Any, Callable
+import bike
+
+
+serializers: dict[type, callable] = {
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    decimal.Decimal: float,
+    uuid.UUID: str,
+}
+
+
+def register_serializer(kind: type, func: callable):
+    serializers[kind] = func
+
+
+def create_model_serializer(model: type[bike.Model]) -> callable:
+    items = ', '.join(f'{name!r}: values[{f"_{name}"!r}]' for name in model.__fields__)
+    code = f'def serialize(o):\n    values = o.__dict__\n    return {{{items}}}\n'
+    ns = {}
+    exec(code, None, ns)
+    return ns['serialize']
+
+
+def create_serializer(kind: type) -> Callable | None:
+    if issubclass(kind, bike.Model):
+        return create_model_serializer(kind)
+    for base in kind.__mro__[1:]:
+        if base in serializers:
+            return serializers[base]
+    if hasattr(kind, 'dict'):
+        return lambda o: o.dict()
+    return None
+
+
+def get_serializer(kind: type) -> Callable | None:
+    try:
+        return serializers[kind]
+    except KeyError:
+        func = create_serializer(kind)
+        if func is not None:
+            serializers[kind] = func
+        return func
+
+
+def serialize(o: Any) -> Any:
+    func = get_serializer(type(o))
+    if func is None:
+        raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+    return func(o)
@@ -10,23 +10,45 @@ class Server:
             host: str = '0.0.0.0',
             port: str = 7777,
             ssl_crt: str = '',
-            ssl_key: str = ''
+            ssl_key: str = '',
+            alpn_protocols: tuple[str, ...] = ('h2', 'http/1.1'),
+            ssl_ciphers: str = 'ECDHE+AESGCM:ECDHE+CHACHA20',
+            ssl_minimum_version: ssl.TLSVersion = ssl.TLSVersion.TLSv1_2,
+            ssl_session_tickets: int = 2
     ):
         self.app = app
         self.host = host
         self.port = port
         self.ssl_crt = ssl_crt
         self.ssl_key = ssl_key
+        self.alpn_protocols = alpn_protocols
+        self.ssl_ciphers = ssl_ciphers
+        self.ssl_minimum_version = ssl_minimum_version
+        self.ssl_session_tickets = ssl_session_tickets
+
+    def create_ssl_context(self) -> ssl.SSLContext:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.ssl_crt, self.ssl_key)
+        context.minimum_version = self.ssl_minimum_version
+        context.options |= ssl.OP_NO_COMPRESSION | ssl.OP_CIPHER_SERVER_PREFERENCE
+        if self.ssl_ciphers:
+            context.set_ciphers(self.ssl_ciphers)
+        if self.ssl_session_tickets:
+            context.num_tickets = self.ssl_session_tickets
+        else:
+            context.num_tickets = 0
+            context.options |= ssl.OP_NO_TICKET
+        context.set_alpn_protocols(list(self.alpn_protocols))
+        return context
 
     async def serve(self):
         print(f' {self.app.title.upper()} '.center(50 - len(self.app.title.upper()), '-'))
         print(f'\033[32mRESTFY\033[0m ON {self.port}')
         if self.ssl_crt and self.ssl_key:
-            context = ssl.SSLContext(ssl.PROTOCOL_TLS)
-            context.load_cert_chain(self.ssl_crt, self.ssl_key)
-            context.set_alpn_protocols(['h2'])
+            context = self.create_ssl_context()
         else:
             context = None
+        await self.app.startup()
         server = await asyncio.start_server(
             self.app.handler,
             self.host,
@@ -34,7 +56,11 @@ class Server:
             ssl=context
         )
         async with server:
-            await server.serve_forever()
+            try:
+                await server.serve_forever()
+            finally:
+                server.close()
+                await self.app.shutdown()
 
     def run(self):
         asyncio.run(self.serve())
@@ -0,0 +1,167 @@
+import asyncio
+import email.utils
+import mimetypes
+import mmap
+import os
+import stat
+from collections import OrderedDict
+from typing import NamedTuple
+from urllib.parse import unquote
+from restfy.request import Request
+from restfy.response import Response, StreamingResponse
+from restfy.router import Router
+from restfy.conditional import is_not_modified
+
+
+class FileResponse(StreamingResponse):
+    def __init__(
+            self,
+            path: str,
+            status: int = 200,
+            *,
+            offset: int = 0,
+            count: int | None = None,
+            chunk_size: int = 65536,
+            content_type: str = '',
+            headers: dict = None
+    ):
+        content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        super().__init__((), status, content_type=content_type, headers=headers)
+        self.path = path
+        self.offset = offset
+        self.count = os.path.getsize(path) - offset if count is None else count
+        self.chunk_size = chunk_size
+
+    def prepare(self, body: bool = True):
+        if self.prepared:
+            return
+        self.headers['Content-Length'] = self.count
+        super().prepare(body)
+
+    async def sendfile(self, transport: asyncio.Transport) -> bool:
+        if self.filters:
+            return False
+        loop = asyncio.get_running_loop()
+        with open(self.path, 'rb') as f:
+            if self.count:
+                await loop.sendfile(transport, f, self.offset, self.count)
+        return True
+
+    async def chunks(self):
+        if not self.count:
+            return
+        end = self.offset + self.count
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for position in range(self.offset, end, self.chunk_size):
+                yield mm[position:min(position + self.chunk_size, end)]
+
+
+class CachedFile(NamedTuple):
+    version: tuple[int, int]
+    content: bytes
+
+
+def parse_range(value: str, size: int) -> tuple[int, int] | None:
+    (unit, _, spec) = value.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        raise ValueError(value)
+    (start, _, end) = spec.strip().partition('-')
+    if not start:
+        length = int(end)
+        if length <= 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+class StaticFiles(Router):
+    def __init__(
+            self,
+            directory: str,
+            *,
+            index: str = 'index.html',
+            cache_size: int = 256,
+            cache_file_size: int = 65536,
+            chunk_size: int = 65536
+    ):
+        super().__init__()
+        self.directory = os.path.realpath(directory)
+        self.index = index
+        self.files: OrderedDict[str, CachedFile] = OrderedDict()
+        self.files_size = cache_size
+        self.cache_file_size = cache_file_size
+        self.chunk_size = chunk_size
+        self.add_route('/', self.serve)
+        self.add_route('/{path:path}', self.serve)
+
+    def resolve_path(self, path: str) -> str | None:
+        if '\x00' in path:
+            return None
+        full = os.path.realpath(os.path.join(self.directory, path))
+        if os.path.commonpath([self.directory, full]) != self.directory:
+            return None
+        if os.path.isdir(full) and self.index:
+            full = os.path.join(full, self.index)
+        return full
+
+    async def serve(self, request: Request, path: str = '') -> Response:
+        full = self.resolve_path(unquote(path))
+        try:
+            info = os.stat(full) if full else None
+        except OSError:
+            info = None
+        if info is None or not stat.S_ISREG(info.st_mode):
+            return Response(status=404)
+        size = info.st_size
+        etag = f'"{info.st_mtime_ns:x}-{size:x}"'
+        headers = {
+            'Accept-Ranges': 'bytes',
+            'ETag': etag,
+            'Last-Modified': email.utils.formatdate(info.st_mtime, usegmt=True),
+        }
+        if is_not_modified(request, etag, headers['Last-Modified']):
+            return Response(status=304, headers=headers)
+        (start, end) = (0, size - 1)
+        status = 200
+        if (value := request.headers.get('Range')) and request.headers.get('If-Range', etag) in (etag, headers['Last-Modified']):
+            try:
+                limits = parse_range(value, size)
+            except ValueError:
+                limits = (start, end)
+            if limits is None:
+                return Response(status=416, headers={'Content-Range': f'bytes */{size}'})
+            if limits != (start, end):
+                (start, end) = limits
+                status = 206
+                headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        content_type = mimetypes.guess_type(full)[0] or 'application/octet-stream'
+        if size <= self.cache_file_size:
+            content = self.read_cached(full, (info.st_mtime_ns, size))
+            return Response(content[start:end + 1], status, content_type=content_type, headers=headers)
+        return FileResponse(
+            full,
+            status,
+            offset=start,
+            count=end - start + 1,
+            chunk_size=self.chunk_size,
+            content_type=content_type,
+            headers=headers
+        )
+
+    def read_cached(self, path: str, version: tuple[int, int]) -> bytes:
+        cached = self.files.get(path)
+        if cached is not None and cached.version == version:
+            self.files.move_to_end(path)
+            return cached.content
+        with open(path, 'rb') as f:
+            content = f.read()
+        if self.files_size:
+            self.files[path] = CachedFile(version=version, content=content)
+            self.files.move_to_end(path)
+            if len(self.files) > self.files_size:
+                self.files.popitem(last=False)
+        return content
@@ -18,11 +18,15 @@ class Client:
         headers = headers or {}
         con = Connection(reader=None, writer=None)
         con.router = self.app.router
-        con.middlewares = self.app.middlewares
         req = con.generate_request(url=url, method=method, version='http/1.1')
         req.app = self.app
         for k, v in headers.items():
             req.add_header(k, v)
+        match = con.router.match(req.url, req.method)
+        res = await con.execute_headers_hooks(match, req)
+        if res is not None:
+            res.render()
+            return res
         content_type = req.headers.get('Content-Type', '')
         if not content_type:
             if isinstance(data, bytes):
@@ -34,8 +38,11 @@ class Client:
             if content_type == 'application/json' and not isinstance(data, bytes):
                 req.body = json.dumps(data).encode()
                 req.add_header('Content-Length', len(req.body))
-        res = await con.execute_handler(req)
-        res.render()
+        res = await con.execute_handler(req, match)
+        res.prepare()
+        if res.streaming:
+            res.body = b''.join([chunk async for chunk in res.stream()])
+        await con.execute_response_hooks(match, req, res)
         return res
 
     async def get(
@@ -85,6 +92,13 @@ class Client:
     ) -> Response:
         return await self.request('OPTIONS', url, data, headers)
 
+    async def head(
+            self,
+            url: str,
+            headers: dict = None
+    ) -> Response:
+        return await self.request('HEAD', url, headers=headers)
+
     async def header(
             self,
             url: str,
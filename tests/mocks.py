@@ -13,3 +13,40 @@ def mock_request(
 ):
     res = MockResponse
     return res
+
+
+class MockSSLObject:
+    def __init__(self, protocol: str | None):
+        self.protocol = protocol
+
+    def selected_alpn_protocol(self):
+        return self.protocol
+
+
+class MockWriter:
+    def __init__(self, reader=None, **extra):
+        self.data = b''
+        self.closed = False
+        self.reader = reader
+        self.extra = extra
+
+    def write(self, data: bytes):
+        self.data += data
+
+    def writelines(self, data):
+        for chunk in data:
+            self.write(chunk)
+
+    async def drain(self):
+        ...
+
+    def close(self):
+        self.closed = True
+        if self.reader and not self.reader.at_eof():
+            self.reader.feed_eof()
+
+    async def wait_closed(self):
+        ...
+
+    def get_extra_info(self, name, default=None):
+        return self.extra.get(name, default)
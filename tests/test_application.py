@@ -1,4 +1,10 @@
-from restfy import Application
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from restfy import Application, Request, Response
+from restfy.codec import Codec, JSONCodec
+from restfy.response import http_date
 from restfy.testing import Client
 
 
@@ -11,7 +17,90 @@ def test_application_instantiation():
     assert app.description == 'Used by test'
 
 
+@pytest.mark.asyncio
+async def test_sync_handler_runs_in_executor():
+    app = Application(max_workers=2)
+    app.register_executor('reports', ThreadPoolExecutor(max_workers=1, thread_name_prefix='reports'))
 
+    @app.get('/blocking')
+    def blocking_handler():
+        return {'thread': threading.current_thread().name}
 
+    @app.get('/reports', executor='reports')
+    def reports_handler():
+        return {'thread': threading.current_thread().name}
 
+    client = Client(app)
+    res = await client.get('/blocking')
+    assert res.parser()['thread'].startswith('restfy')
+    res = await client.get('/reports')
+    assert res.parser()['thread'].startswith('reports')
+    await app.shutdown()
 
+
+def process_handler(request: Request, size: int):
+    return {'pid': os.getpid(), 'size': size, 'url': request.url}
+
+
+async def async_process_handler(size: int):
+    return Response({'pid': os.getpid()}, status=201, headers={'Acme-Size': str(size)})
+
+
+@pytest.mark.asyncio
+async def test_handler_runs_in_process():
+    app = Application(max_processes=1)
+    app.add_route('/reports', process_handler, executor='process')
+    app.add_route('/reports', async_process_handler, method='POST', executor='process')
+    client = Client(app)
+    res = await client.get('/reports?size=3')
+    data = res.parser()
+    assert data['pid'] != os.getpid()
+    assert data['size'] == 3
+    assert data['url'] == '/reports'
+    res = await client.post('/reports?size=5', data={})
+    assert res.status == 201
+    assert res.headers['Acme-Size'] == '5'
+    assert res.parser()['pid'] != os.getpid()
+    await app.shutdown()
+
+
+class UpperCodec(JSONCodec):
+    def encode(self, data):
+        return super().encode(data).upper()
+
+
+@pytest.mark.asyncio
+async def test_application_codec():
+    app = Application(codec=UpperCodec())
+
+    @app.post('/servers')
+    async def create_server(request: Request):
+        return {'name': request.data['name']}
+
+    client = Client(app)
+    res = await client.post('/servers', data={'name': 'trix'})
+    assert res.body == b'{"NAME": "TRIX"}'
+
+
+class EncodeOnlyCodec(Codec):
+    def encode(self, data):
+        return b''
+
+
+def test_application_codec_abstract_methods():
+    with pytest.raises(TypeError):
+        EncodeOnlyCodec()
+
+
+@pytest.mark.asyncio
+async def test_date_header_timer():
+    app = Application()
+    await app.startup()
+    assert http_date.timer is not None
+    res = Response({'id': 1}, status=413)
+    head = res.render().split(b'\r\n\r\n')[0]
+    assert head.startswith(b'HTTP/1.1 413 PAYLOAD TOO LARGE\r\n')
+    assert f'Date: {http_date.value}'.encode() in head
+    assert b'Server: restfy' in head
+    await app.shutdown()
+    assert http_date.timer is None
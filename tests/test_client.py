@@ -74,3 +74,26 @@ async def teste_middleware_interception():
     assert res.status == 200
     assert res.headers['Acme-Transaction-Id'] == '123456789'
     assert res.headers['Acme-Session-Id'] == '987654321'
+
+
+@pytest.mark.asyncio
+async def test_method_not_allowed():
+    res = await client.patch('/servers', data={})
+    assert res.status == 405
+    assert res.headers['Allow'] == 'GET, HEAD, OPTIONS, POST'
+
+
+@pytest.mark.asyncio
+async def test_head_runs_get_without_body():
+    res = await client.head('/servers')
+    assert res.status == 200
+    assert res.headers['Content-Type'] == 'application/json'
+    assert res.render().endswith(b'\r\n\r\n')
+
+
+@pytest.mark.asyncio
+async def test_options_from_route_table():
+    res = await client.options('/servers/1', headers={'Origin': 'http://acme.com'})
+    assert res.status == 204
+    assert res.headers['Allow'] == 'DELETE, GET, HEAD, OPTIONS, PUT'
+    assert res.headers['Access-Control-Allow-Origin'] == '*'
@@ -0,0 +1,57 @@
+import gzip
+import json
+import zlib
+import pytest
+from restfy import Application, Response, StreamingJSONResponse
+from restfy.compression import CompressionMiddleware, parse_accept_encoding
+from restfy.testing import Client
+
+
+def create_application() -> Application:
+    app = Application()
+    app.register_middleware(CompressionMiddleware(minimum_size=100, thread_size=1000))
+
+    @app.get('/servers')
+    async def list_servers(size: int = 10):
+        return [{'id': i, 'name': f'server-{i}'} for i in range(size)]
+
+    @app.get('/export')
+    async def export_servers():
+        return StreamingJSONResponse(({'id': i} for i in range(500)), chunk_size=256)
+
+    @app.get('/origins')
+    async def list_origins():
+        return Response(['acme'] * 100, headers={'Vary': 'Origin'})
+
+    return app
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip;q=0.5, deflate, br;q=0') == {'gzip': 0.5, 'deflate': 1.0, 'br': 0.0}
+
+
+@pytest.mark.asyncio
+async def test_compression_negotiation():
+    client = Client(create_application())
+    res = await client.get('/servers', headers={'Accept-Encoding': 'gzip, deflate;q=0.5'})
+    assert res.headers['Content-Encoding'] == 'gzip'
+    assert res.headers['Vary'] == 'Accept-Encoding'
+    assert res.headers['Content-Length'] == len(res.body)
+    assert len(json.loads(gzip.decompress(res.body))) == 10
+    res = await client.get('/servers?size=1000', headers={'Accept-Encoding': 'deflate'})
+    assert res.headers['Content-Encoding'] == 'deflate'
+    assert len(json.loads(zlib.decompress(res.body))) == 1000
+    res = await client.get('/servers?size=1', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in res.headers
+    res = await client.get('/servers', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in res.headers
+    res = await client.get('/origins', headers={'Accept-Encoding': 'gzip'})
+    assert res.headers['Vary'] == 'Origin, Accept-Encoding'
+
+
+@pytest.mark.asyncio
+async def test_compression_streaming():
+    client = Client(create_application())
+    res = await client.get('/export', headers={'Accept-Encoding': 'gzip'})
+    assert res.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(res.body)) == [{'id': i} for i in range(500)]
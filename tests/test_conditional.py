@@ -0,0 +1,75 @@
+import pytest
+from restfy import Application, Response
+from restfy.static import StaticFiles
+from restfy.testing import Client
+
+
+@pytest.fixture
+def application(tmp_path):
+    (tmp_path / 'index.html').write_text('<h1>restfy</h1>')
+    app = Application()
+
+    @app.get('/items', etag=True)
+    async def items():
+        return {'items': [1, 2, 3]}
+
+    @app.get('/weak', etag='weak')
+    async def weak():
+        return 'weak'
+
+    @app.get('/version', etag=True)
+    async def version():
+        res = Response({'version': 7}, headers={'Last-Modified': 'Mon, 19 Oct 2026 10:00:00 GMT'})
+        res.set_etag(7)
+        return res
+
+    app.register_router('/static', StaticFiles(str(tmp_path)))
+    return app
+
+
+@pytest.mark.asyncio
+async def test_conditional_etag(application):
+    client = Client(application)
+    res = await client.get('/items')
+    assert res.status == 200
+    etag = res.headers['ETag']
+    assert etag.startswith('"')
+    res = await client.get('/items', headers={'If-None-Match': f'"other", {etag}'})
+    assert res.status == 304
+    assert res.body == b''
+    assert 'Content-Length' not in res.headers
+    assert res.headers['ETag'] == etag
+    res = await client.get('/items', headers={'If-None-Match': '"other"'})
+    assert res.status == 200
+    res = await client.get('/weak')
+    assert res.headers['ETag'].startswith('W/"')
+    res = await client.get('/weak', headers={'If-None-Match': res.headers['ETag'][2:]})
+    assert res.status == 304
+
+
+@pytest.mark.asyncio
+async def test_conditional_version(application):
+    client = Client(application)
+    res = await client.get('/version')
+    assert res.headers['ETag'] == '"7"'
+    res = await client.get('/version', headers={'If-None-Match': '"7"'})
+    assert res.status == 304
+    res = await client.get('/version', headers={'If-Modified-Since': 'Mon, 19 Oct 2026 12:00:00 GMT'})
+    assert res.status == 304
+    res = await client.get('/version', headers={'If-Modified-Since': 'Mon, 19 Oct 2026 08:00:00 GMT'})
+    assert res.status == 200
+    res = await client.get('/version', headers={'If-Modified-Since': 'Mon, 19 Oct 2026 12:00:00 -0000'})
+    assert res.status == 304
+    res = await client.get('/version', headers={'If-None-Match': '"6"', 'If-Modified-Since': 'Mon, 19 Oct 2026 12:00:00 GMT'})
+    assert res.status == 200
+
+
+@pytest.mark.asyncio
+async def test_conditional_static(application):
+    client = Client(application)
+    res = await client.get('/static/index.html')
+    res = await client.get('/static/index.html', headers={'If-None-Match': res.headers['ETag']})
+    assert res.status == 304
+    assert res.body == b''
+    res = await client.get('/static/index.html', headers={'If-Modified-Since': res.headers['Last-Modified']})
+    assert res.status == 304
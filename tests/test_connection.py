@@ -0,0 +1,516 @@
+import asyncio
+import json
+import pytest
+from restfy import Application, Middleware, Request, Response, StreamingJSONResponse
+from restfy.connection import H2Connection, frame
+from restfy.connection.frame import encode_string
+from restfy.testing import Client
+from .acme.main import app
+from .mocks import MockWriter, MockSSLObject
+
+
+PREFACE = b'PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n'
+
+
+def h2_frame(kind: int, flags: int, stream: int, payload: bytes) -> bytes:
+    return (
+        len(payload).to_bytes(3, byteorder='big')
+        + kind.to_bytes(1, byteorder='big')
+        + flags.to_bytes(1, byteorder='big')
+        + stream.to_bytes(4, byteorder='big')
+        + payload
+    )
+
+
+def h2_frames(data: bytes) -> list[tuple[int, int, int, bytes]]:
+    frames = []
+    p = 0
+    while p < len(data):
+        length = int.from_bytes(data[p:p + 3], byteorder='big')
+        kind, flags = data[p + 3], data[p + 4]
+        stream = int.from_bytes(data[p + 5:p + 9], byteorder='big')
+        frames.append((kind, flags, stream, data[p + 9:p + 9 + length]))
+        p += 9 + length
+    return frames
+
+
+async def serve(application: Application, data: bytes, **extra) -> MockWriter:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    writer = MockWriter(**extra)
+    await application.handler(reader, writer)
+    return writer
+
+
+def hpack_field(name: str, value: str) -> bytes:
+    return b'\x40' + encode_string(name) + encode_string(value)
+
+
+def test_hpack_decoder():
+    connection = H2Connection(reader=None, writer=None)
+    blocks = (
+        '828684418cf1e3c2e5f23a6ba0ab90f4ff',
+        '828684be5886a8eb10649cbf',
+        '828785bf408825a849e95ba97d7f8925a849e95bb8e8b4bf',
+    )
+    headers = []
+    for block in blocks:
+        fme = frame.HeaderFrame(length=b'\x00\x00\x00', flags=0, stream=b'\x00\x00\x00\x01', connection=connection)
+        headers.append(fme.decode_payload(bytes.fromhex(block)))
+    assert headers[0] == {'method': 'GET', 'scheme': 'http', 'path': '/', 'authority': 'www.example.com'}
+    assert headers[1]['cache-control'] == 'no-cache'
+    assert headers[2]['path'] == '/index.html'
+    assert headers[2]['custom-key'] == 'custom-value'
+    assert connection.dynamic_table.size == 164
+
+
+@pytest.mark.asyncio
+async def test_h2_continuation_header_block():
+    application = Application()
+
+    @application.get('/token')
+    async def token_handler(request: Request):
+        return {'size': len(request.get_header('Authorization'))}
+
+    block = b'\x82\x86' + hpack_field(':path', '/token') + hpack_field('authorization', 'Bearer ' + 'x' * 600)
+    headers = h2_frame(0x1, 0b00000001, 1, block[:100])
+    continuations = h2_frame(0x9, 0, 1, block[100:300]) + h2_frame(0x9, 0b00000100, 1, block[300:])
+    writer = await serve(application, PREFACE + headers + continuations)
+    frames = h2_frames(writer.data)
+    data = [payload for kind, _, stream, payload in frames if kind == 0x0 and stream == 1]
+    assert json.loads(data[0]) == {'size': 607}
+
+
+@pytest.mark.asyncio
+async def test_h2_continuation_compression_error():
+    headers = h2_frame(0x1, 0b00000001, 1, b'\x82\x86')
+    continuation = h2_frame(0x9, 0b00000100, 1, b'\xff\x7f')
+    writer = await serve(app, PREFACE + headers + continuation)
+    assert goaway_frames(writer.data) == [(0, 9)]
+    assert writer.closed
+
+
+@pytest.mark.asyncio
+async def test_h2_header_block_size_limit():
+    application = Application(max_header_list_size=8)
+    headers = h2_frame(0x1, 0b00000001, 1, b'\x82\x86')
+    continuation = h2_frame(0x9, 0b00000100, 1, b'\x44\x07/health')
+    writer = await serve(application, PREFACE + headers + continuation)
+    frames = h2_frames(writer.data)
+    assert not [kind for kind, _, stream, _ in frames if stream == 1]
+    assert writer.closed
+
+
+@pytest.mark.asyncio
+async def test_h2c_upgrade():
+    request = (
+        b'GET /health HTTP/1.1\r\n'
+        b'Host: localhost\r\n'
+        b'Connection: Upgrade, HTTP2-Settings\r\n'
+        b'Upgrade: h2c\r\n'
+        b'HTTP2-Settings: AAMAAABkAAQAAP__\r\n'
+        b'\r\n'
+    )
+    writer = await serve(app, request + PREFACE + h2_frame(0x4, 0, 0, b''))
+    head, data = writer.data.split(b'\r\n\r\n', maxsplit=1)
+    assert head.startswith(b'HTTP/1.1 101')
+    frames = h2_frames(data)
+    assert frames[0][0] == 0x4
+    body = [payload for kind, _, stream, payload in frames if kind == 0x0 and stream == 1]
+    assert json.loads(body[0])['name'] == 'ACME API'
+
+
+@pytest.mark.asyncio
+async def test_h2c_upgrade_next_requests():
+    request = (
+        b'GET /health HTTP/1.1\r\n'
+        b'Host: localhost\r\n'
+        b'Connection: Upgrade, HTTP2-Settings\r\n'
+        b'Upgrade: h2c\r\n'
+        b'HTTP2-Settings: AAMAAABkAAQAAP__\r\n'
+        b'\r\n'
+    )
+    second = h2_frame(0x1, 0b00000101, 3, b'\x82\x86' + hpack_field(':path', '/health') + hpack_field(':authority', 'localhost'))
+    third = h2_frame(0x1, 0b00000101, 5, b'\x82\x86\xbf\xbe')
+    writer = await serve(app, request + PREFACE + h2_frame(0x4, 0, 0, b'') + second + third)
+    (_, data) = writer.data.split(b'\r\n\r\n', maxsplit=1)
+    frames = h2_frames(data)
+    assert not goaway_frames(data)
+    for stream in (1, 3, 5):
+        body = [payload for kind, _, sid, payload in frames if kind == 0x0 and sid == stream]
+        assert json.loads(body[0])['name'] == 'ACME API'
+
+
+@pytest.mark.asyncio
+async def test_h2c_upgrade_ignored_over_tls():
+    request = (
+        b'GET /health HTTP/1.1\r\n'
+        b'Host: localhost\r\n'
+        b'Connection: Upgrade, HTTP2-Settings\r\n'
+        b'Upgrade: h2c\r\n'
+        b'HTTP2-Settings: AAMAAABkAAQAAP__\r\n'
+        b'\r\n'
+    )
+    writer = await serve(app, request, ssl_object=MockSSLObject('http/1.1'))
+    assert writer.data.startswith(b'HTTP/1.1 200')
+
+@pytest.mark.asyncio
+async def test_alpn_h2_selection():
+    block = b'\x82\x87' + hpack_field(':path', '/health') + hpack_field(':authority', 'localhost')
+    headers = h2_frame(0x1, 0b00000101, 1, block)
+    writer = await serve(app, PREFACE + headers, ssl_object=MockSSLObject('h2'))
+    frames = h2_frames(writer.data)
+    body = [payload for kind, _, stream, payload in frames if kind == 0x0 and stream == 1]
+    assert json.loads(body[0])['name'] == 'ACME API'
+
+
+@pytest.mark.asyncio
+async def test_alpn_http1_selection():
+    request = b'GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n'
+    writer = await serve(app, request, ssl_object=MockSSLObject('http/1.1'))
+    assert writer.data.startswith(b'HTTP/1.1 200')
+
+
+@pytest.mark.asyncio
+async def test_h2_server_push():
+    application = Application()
+
+    @application.get('/', push=['/bootstrap'])
+    async def index_handler():
+        return {'page': 'index'}
+
+    @application.get('/bootstrap')
+    async def bootstrap_handler():
+        return {'user': 'acme'}
+
+    headers = h2_frame(0x1, 0b00000101, 1, b'\x82\x86\x84')
+    writer = await serve(application, PREFACE + headers)
+    frames = h2_frames(writer.data)
+    promises = [payload for kind, _, stream, payload in frames if kind == 0x5 and stream == 1]
+    assert int.from_bytes(promises[0][:4], byteorder='big') == 2
+    body = [payload for kind, _, stream, payload in frames if kind == 0x0 and stream == 2]
+    assert json.loads(body[0]) == {'user': 'acme'}
+
+
+class PushGuard(Middleware):
+    def __init__(self):
+        super().__init__()
+        self.flushed = []
+
+    def on_headers(self, request):
+        if request.url == '/private':
+            return Response(status=401)
+
+    async def on_response(self, request, response):
+        self.flushed.append(request.url)
+
+
+@pytest.mark.asyncio
+async def test_h2_server_push_hooks():
+    application = Application()
+    guard = PushGuard()
+    application.register_middleware(guard)
+
+    @application.get('/', push=['/private', '/bootstrap'])
+    async def index_handler():
+        return {'page': 'index'}
+
+    @application.get('/private')
+    async def private_handler():
+        return {'secret': 'acme'}
+
+    @application.get('/bootstrap')
+    async def bootstrap_handler():
+        return {'user': 'acme'}
+
+    headers = h2_frame(0x1, 0b00000101, 1, b'\x82\x86\x84')
+    writer = await serve(application, PREFACE + headers)
+    frames = h2_frames(writer.data)
+    promises = [payload for kind, _, stream, payload in frames if kind == 0x5 and stream == 1]
+    assert [int.from_bytes(payload[:4], byteorder='big') for payload in promises] == [2]
+    assert guard.flushed == ['/', '/bootstrap']
+
+@pytest.mark.asyncio
+async def test_h2_server_push_disabled():
+    application = Application()
+
+    @application.get('/', push=['/bootstrap'])
+    async def index_handler():
+        return {'page': 'index'}
+
+    @application.get('/bootstrap')
+    async def bootstrap_handler():
+        return {'user': 'acme'}
+
+    settings = h2_frame(0x4, 0, 0, b'\x00\x02\x00\x00\x00\x00')
+    headers = h2_frame(0x1, 0b00000101, 1, b'\x82\x86\x84')
+    writer = await serve(application, PREFACE + settings + headers)
+    frames = h2_frames(writer.data)
+    assert not [kind for kind, _, _, _ in frames if kind == 0x5]
+
+
+def goaway_frames(data: bytes) -> list[tuple[int, int]]:
+    return [
+        (int.from_bytes(payload[:4], byteorder='big'), int.from_bytes(payload[4:8], byteorder='big'))
+        for kind, _, _, payload in h2_frames(data) if kind == 0x7
+    ]
+
+
+@pytest.mark.asyncio
+async def test_h2_goaway_after_max_streams():
+    application = Application(h2_max_streams=1)
+
+    @application.get('/')
+    async def index_handler():
+        return {'page': 'index'}
+
+    first = h2_frame(0x1, 0b00000101, 1, b'\x82\x86\x84')
+    second = h2_frame(0x1, 0b00000101, 3, b'\x82\x86\x84')
+    writer = await serve(application, PREFACE + first + second)
+    assert goaway_frames(writer.data) == [(1, 0)]
+    streams = {stream for kind, _, stream, _ in h2_frames(writer.data) if kind == 0x0}
+    assert streams == {1}
+
+
+@pytest.mark.asyncio
+async def test_h2_goaway_on_protocol_error():
+    headers = h2_frame(0x1, 0b00000001, 1, b'\x82\x86')
+    ping = h2_frame(0x6, 0, 0, b'\x00' * 8)
+    writer = await serve(app, PREFACE + headers + ping)
+    assert goaway_frames(writer.data) == [(0, 1)]
+    assert writer.closed
+
+
+@pytest.mark.asyncio
+async def test_h2_goaway_on_client_push_promise():
+    promise = h2_frame(0x5, 0b00000100, 1, b'\x00\x00\x00\x02\x82\x86\x84')
+    writer = await serve(app, PREFACE + promise)
+    assert goaway_frames(writer.data) == [(0, 1)]
+    assert writer.closed
+
+@pytest.mark.asyncio
+async def test_h2_goaway_on_shutdown():
+    application = Application()
+    reader = asyncio.StreamReader()
+    reader.feed_data(PREFACE)
+    writer = MockWriter(reader=reader)
+    task = asyncio.create_task(application.handler(reader, writer))
+    await asyncio.sleep(0)
+    await application.shutdown(timeout=1)
+    await task
+    assert goaway_frames(writer.data) == [(0, 0)]
+    assert not application.connections
+
+
+class UploadGuard(Middleware):
+    def __init__(self):
+        super().__init__()
+        self.flushed = []
+
+    def on_headers(self, request):
+        if request.length > 10:
+            return Response({'message': 'Payload Too Large'}, status=413)
+
+    async def on_response(self, request, response):
+        self.flushed.append(response.status)
+
+
+async def upload_handler(request: Request):
+    return {'size': len(request.body)}
+
+
+@pytest.mark.asyncio
+async def test_h1_rejected_before_body():
+    application = Application()
+    guard = UploadGuard()
+    application.add_route('/upload', upload_handler, method='POST', middlewares=[guard])
+    reader = asyncio.StreamReader()
+    reader.feed_data(b'POST /upload HTTP/1.1\r\nContent-Length: 1000\r\n\r\n' + b'x' * 1000)
+    reader.feed_eof()
+    writer = MockWriter()
+    await application.handler(reader, writer)
+    assert writer.data.startswith(b'HTTP/1.1 413')
+    assert not reader.at_eof()
+    assert guard.flushed == [413]
+
+
+@pytest.mark.asyncio
+async def test_h2_rejected_before_body():
+    application = Application()
+    guard = UploadGuard()
+    application.add_route('/upload', upload_handler, method='POST', middlewares=[guard])
+    headers = h2_frame(0x1, 0b00000100, 1, b'\x83\x86\x44\x07/upload\x0f\x0d\x041000')
+    body = h2_frame(0x0, 0b00000001, 1, b'x' * 1000)
+    writer = await serve(application, PREFACE + headers + body)
+    frames = h2_frames(writer.data)
+    assert [kind for kind, _, stream, _ in frames if stream == 1] == [0x1, 0x0, 0x3]
+    assert frames[-1][3] == b'\x00\x00\x00\x00'
+    assert guard.flushed == [413]
+
+
+async def report_handler():
+    return 'ção' * 10000
+
+
+@pytest.mark.asyncio
+async def test_h1_response_byte_length():
+    application = Application()
+    application.add_route('/report', report_handler)
+    writer = await serve(application, b'GET /report HTTP/1.1\r\n\r\n')
+    (head, body) = writer.data.split(b'\r\n\r\n', maxsplit=1)
+    assert b'Content-Length: 50000' in head
+    assert body.decode() == 'ção' * 10000
+
+
+@pytest.mark.asyncio
+async def test_h2_data_split_by_max_frame_size():
+    application = Application()
+    application.add_route('/report', report_handler)
+    headers = h2_frame(0x1, 0b00000101, 1, b'\x82\x86\x44\x07/report')
+    writer = await serve(application, PREFACE + headers)
+    frames = [(flags, payload) for kind, flags, stream, payload in h2_frames(writer.data) if kind == 0x0]
+    assert [len(payload) for _, payload in frames] == [16384, 16384, 16384, 848]
+    assert [flags for flags, _ in frames] == [0, 0, 0, 1]
+    assert b''.join(payload for _, payload in frames).decode() == 'ção' * 10000
+
+
+async def export_handler():
+    async def rows():
+        for i in range(3):
+            yield {'id': i}
+    return StreamingJSONResponse(rows(), chunk_size=1)
+
+
+def dechunk(body: bytes) -> list[bytes]:
+    chunks = []
+    while True:
+        (size, body) = body.split(b'\r\n', maxsplit=1)
+        size = int(size, 16)
+        if not size:
+            return chunks
+        chunks.append(body[:size])
+        body = body[size + 2:]
+
+
+@pytest.mark.asyncio
+async def test_h1_streaming_json_chunked():
+    application = Application()
+    application.add_route('/export', export_handler)
+    writer = await serve(application, b'GET /export HTTP/1.1\r\n\r\n')
+    (head, body) = writer.data.split(b'\r\n\r\n', maxsplit=1)
+    assert b'Transfer-Encoding: chunked' in head
+    assert b'Content-Length' not in head
+    chunks = dechunk(body)
+    assert chunks[0] == b'[{"id": 0}'
+    assert chunks[-1] == b']'
+    assert json.loads(b''.join(chunks)) == [{'id': 0}, {'id': 1}, {'id': 2}]
+    res = await Client(application).get('/export')
+    assert res.parser() == [{'id': 0}, {'id': 1}, {'id': 2}]
+
+
+@pytest.mark.asyncio
+async def test_h1_0_streaming_json_unchunked():
+    application = Application()
+    application.add_route('/export', export_handler)
+    writer = await serve(application, b'GET /export HTTP/1.0\r\n\r\n')
+    (head, body) = writer.data.split(b'\r\n\r\n', maxsplit=1)
+    assert head.startswith(b'HTTP/1.0 200 OK\r\n')
+    assert b'Transfer-Encoding' not in head
+    assert json.loads(body) == [{'id': 0}, {'id': 1}, {'id': 2}]
+    assert writer.closed
+
+@pytest.mark.asyncio
+async def test_h2_streaming_flow_control():
+    application = Application()
+
+    @application.get('/export')
+    async def large_export():
+        return StreamingJSONResponse(({'row': 'x' * 1000} for _ in range(100)), ndjson=True)
+
+    reader = asyncio.StreamReader()
+    reader.feed_data(PREFACE + h2_frame(0x1, 0b00000101, 1, b'\x82\x86\x44\x07/export'))
+    writer = MockWriter()
+    task = asyncio.create_task(application.handler(reader, writer))
+    for _ in range(100):
+        await asyncio.sleep(0)
+
+    def sent() -> bytes:
+        return b''.join(payload for kind, _, stream, payload in h2_frames(writer.data) if kind == 0x0)
+
+    assert len(sent()) == 65535
+    increment = (200000).to_bytes(4, byteorder='big')
+    reader.feed_data(h2_frame(0x8, 0, 0, increment) + h2_frame(0x8, 0, 1, increment))
+    reader.feed_eof()
+    await task
+    lines = sent().splitlines()
+    assert len(lines) == 100
+    assert json.loads(lines[0]) == {'row': 'x' * 1000}
+    assert h2_frames(writer.data)[-1][1] == 0b00000001
+
+
+@pytest.mark.asyncio
+async def test_h2_disconnect_with_exhausted_window():
+    application = Application()
+
+    @application.get('/export')
+    async def large_export():
+        return StreamingJSONResponse(({'row': 'x' * 1000} for _ in range(100)), ndjson=True)
+
+    reader = asyncio.StreamReader()
+    reader.feed_data(PREFACE + h2_frame(0x1, 0b00000101, 1, b'\x82\x86\x44\x07/export'))
+    writer = MockWriter()
+    task = asyncio.create_task(application.handler(reader, writer))
+    for _ in range(100):
+        await asyncio.sleep(0)
+    reader.feed_eof()
+    await asyncio.wait_for(task, timeout=1)
+    assert writer.closed
+    assert not application.connections
+
+
+@pytest.mark.asyncio
+async def test_h2_handler_error():
+    application = Application()
+
+    @application.get('/items')
+    async def list_items(page: int = 1):
+        return {'page': page}
+
+    headers = h2_frame(0x1, 0b00000101, 1, b'\x82\x86\x44\x0f/items?page=abc')
+    writer = await serve(application, PREFACE + headers)
+    frames = [(kind, payload) for kind, _, stream, payload in h2_frames(writer.data) if stream == 1]
+    assert [kind for kind, _ in frames] == [0x1, 0x0]
+    assert frames[0][1][:1] == b'\x8c'
+    assert json.loads(frames[1][1])['message'] == 'Bad Request'
+
+
+@pytest.mark.asyncio
+async def test_h2_malformed_request_headers():
+    application = Application()
+
+    @application.get('/')
+    async def index_handler():
+        return {'page': 'index'}
+
+    missing_method = h2_frame(0x1, 0b00000101, 1, b'\x86\x84')
+    valid = h2_frame(0x1, 0b00000101, 3, b'\x82\x86\x84')
+    writer = await serve(application, PREFACE + missing_method + valid)
+    frames = h2_frames(writer.data)
+    assert [(kind, payload) for kind, _, stream, payload in frames if stream == 1] == [(0x3, b'\x00\x00\x00\x01')]
+    assert [kind for kind, _, stream, _ in frames if stream == 3] == [0x1, 0x0]
+    assert writer.closed
+    assert not application.connections
+
+
+@pytest.mark.asyncio
+async def test_h2_goaway_on_internal_error(monkeypatch):
+    async def process_headers(self, fme):
+        raise RuntimeError('broken')
+
+    monkeypatch.setattr(H2Connection, 'process_headers', process_headers)
+    application = Application()
+    writer = await serve(application, PREFACE + h2_frame(0x1, 0b00000101, 1, b'\x82\x86\x84'))
+    assert goaway_frames(writer.data) == [(0, 2)]
+    assert writer.closed
+    assert not application.connections
@@ -0,0 +1,56 @@
+import pytest
+from restfy import Request
+from restfy.handler import BindError, Handler
+
+
+async def search_handler(
+        page: int,
+        size: int = 10,
+        active: bool = False,
+        tags: list[int] = None,
+        owner: str | None = None
+):
+    return {'page': page, 'size': size, 'active': active, 'tags': tags, 'owner': owner}
+
+
+def create_request(vars: dict = None, params: dict = None) -> Request:
+    request = Request()
+    request.vars = vars or {}
+    request.params = params or {}
+    return request
+
+
+@pytest.mark.asyncio
+async def test_handler_binds_falsy_values():
+    handler = Handler(search_handler)
+    request = create_request(vars={'page': '0'}, params={'active': 'false', 'tags': ['1', '2']})
+    res = await handler.execute(request)
+    assert res.data == {'page': 0, 'size': 10, 'active': False, 'tags': [1, 2], 'owner': None}
+    assert request.vars == {}
+    assert request.params == {}
+
+
+@pytest.mark.asyncio
+async def test_handler_binds_optional_and_bool():
+    handler = Handler(search_handler)
+    request = create_request(params={'page': '2', 'active': 'on', 'owner': 'acme', 'other': 'x'})
+    res = await handler.execute(request)
+    assert res.data == {'page': 2, 'size': 10, 'active': True, 'tags': None, 'owner': 'acme'}
+    assert request.params == {'other': 'x'}
+
+
+@pytest.mark.asyncio
+async def test_handler_cast_error():
+    handler = Handler(search_handler)
+    with pytest.raises(BindError, match='Error try cast value'):
+        await handler.execute(create_request(params={'page': 'first'}))
+
+
+@pytest.mark.asyncio
+async def test_handler_binds_repeated_query_keys():
+    handler = Handler(search_handler)
+    request = Request()
+    request.query = 'page=2&tags=1&tags=2&tags=3'
+    res = await handler.execute(request)
+    assert res.data['page'] == 2
+    assert res.data['tags'] == [1, 2, 3]
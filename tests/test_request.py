@@ -0,0 +1,190 @@
+import asyncio
+import json
+import pytest
+from restfy import Application, Request
+from restfy.testing import Client
+from restfy.codec import JSONCodec
+from restfy.multipart import MultipartError, MultipartParser
+from restfy.query import parse_query
+from restfy.headers import Headers
+from .mocks import MockWriter
+
+
+class CountingCodec(JSONCodec):
+    def __init__(self):
+        super().__init__()
+        self.decoded = 0
+
+    def decode(self, data):
+        self.decoded += 1
+        return super().decode(data)
+
+
+class MockApp:
+    def __init__(self):
+        self.codec = CountingCodec()
+
+
+def test_request_data_decoded_lazily():
+    request = Request(method='POST')
+    request.app = MockApp()
+    request.add_header('Content-Type', 'application/json')
+    request.body = json.dumps({'id': 9}).encode()
+    assert request.app.codec.decoded == 0
+    assert request.data == {'id': 9}
+    assert request.data == {'id': 9}
+    assert request.app.codec.decoded == 1
+
+
+def multipart_body(boundary: str, content: bytes) -> bytes:
+    return (
+        f'--{boundary}\r\n'
+        'Content-Disposition: form-data; name="title"\r\n\r\n'
+        'Report\r\n'
+        f'--{boundary}\r\n'
+        'Content-Disposition: form-data; name="document"; filename="report.txt"\r\n'
+        'Content-Type: text/plain\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+
+
+@pytest.mark.asyncio
+async def test_multipart_streamed_to_spooled_files(tmp_path):
+    content = b'line\r\n--not-boundary\r\n' * 200
+    body = multipart_body('XyZ', content)
+    request = Request(method='POST')
+    request.add_header('Content-Type', 'multipart/form-data; boundary=XyZ')
+    request.parser = MultipartParser(request.boundary, spool_size=1024)
+    for i in range(0, len(body), 7):
+        request.feed(body[i:i + 7])
+    request.finish()
+    assert request.data == {'title': 'Report'}
+    file = request.files['document']
+    assert file.name == 'report.txt'
+    assert file.type == 'text/plain'
+    assert file.stream._rolled
+    path = tmp_path / 'report.txt'
+    await file.save(path)
+    assert path.read_bytes() == content
+
+
+def test_multipart_body_decoded_lazily():
+    request = Request(method='POST')
+    request.add_header('Content-Type', 'multipart/form-data; boundary=XyZ')
+    request.body = multipart_body('XyZ', b'small')
+    assert request.files['document'].content == b'small'
+    assert request.data == {'title': 'Report'}
+
+
+def test_multipart_field_size_limit():
+    parser = MultipartParser('XyZ', max_field_size=4)
+    with pytest.raises(MultipartError):
+        parser.feed(multipart_body('XyZ', b'small'))
+
+
+async def upload(application: Application, body: bytes) -> bytes:
+    reader = asyncio.StreamReader()
+    reader.feed_data(
+        b'POST /documents HTTP/1.1\r\n'
+        b'Content-Type: multipart/form-data; boundary=XyZ\r\n'
+        b'Content-Length: %d\r\n\r\n' % len(body) + body
+    )
+    reader.feed_eof()
+    writer = MockWriter()
+    await application.handler(reader, writer)
+    return writer.data
+
+
+@pytest.mark.asyncio
+async def test_malformed_multipart_response():
+    application = Application(multipart_max_field_size=4)
+
+    @application.post('/documents')
+    async def upload_document(request: Request):
+        return {'title': request.data['title']}
+
+    body = multipart_body('XyZ', b'small')
+    assert (await upload(application, body)).startswith(b'HTTP/1.1 400')
+    application.multipart_max_field_size = 1024
+    assert (await upload(application, body)).startswith(b'HTTP/1.1 200')
+    assert (await upload(application, body[:-8])).startswith(b'HTTP/1.1 400')
+    invalid = body.replace(b'Report', b'\xff\xfe')
+    assert (await upload(application, invalid)).startswith(b'HTTP/1.1 400')
+
+def test_query_parsed_lazily():
+    request = Request()
+    request.query = 'q=red+car&tag=a%2Fb&tag=c&flag&empty='
+    assert request._query_args is None
+    assert request.query_args == {'q': 'red car', 'tag': 'c', 'flag': '', 'empty': ''}
+    assert request.query_args.getall('tag') == ['a/b', 'c']
+    assert request.params.popall('tag') == ['a/b', 'c']
+    assert request.query_args.getall('tag') == ['a/b', 'c']
+    assert 'tag' not in request.params
+
+
+def test_query_fields_limit():
+    with pytest.raises(ValueError):
+        parse_query('a=1&' * 10, max_fields=5)
+
+
+@pytest.mark.asyncio
+async def test_query_fields_limit_response():
+    application = Application(max_query_fields=5)
+
+    @application.get('/items')
+    async def list_items(page: int = 1):
+        return {'page': page}
+
+    res = await Client(application).get('/items?' + 'a=1&' * 10)
+    assert res.status == 400
+    reader = asyncio.StreamReader()
+    reader.feed_data(b'GET /items?' + b'a=1&' * 10 + b' HTTP/1.1\r\n\r\n')
+    reader.feed_eof()
+    writer = MockWriter()
+    await application.handler(reader, writer)
+    assert writer.data.startswith(b'HTTP/1.1 400')
+
+
+def test_urlencoded_body():
+    request = Request(method='POST')
+    request.add_header('Content-Type', 'application/x-www-form-urlencoded')
+    request.body = b'name=Jos%C3%A9+Silva&role=admin&role=dev'
+    assert request.data == {'name': 'José Silva', 'role': 'dev'}
+    assert request.data.getall('role') == ['admin', 'dev']
+
+
+def test_headers_multimap():
+    headers = Headers([(b'Accept', b'text/html'), (b'X-Forwarded-For', b'10.0.0.1'), (b'x-forwarded-for', b'10.0.0.2')])
+    assert headers['accept'] == 'text/html'
+    assert headers.getall('X-FORWARDED-FOR') == ['10.0.0.1', '10.0.0.2']
+    assert list(headers) == ['Accept', 'X-Forwarded-For']
+    headers['Accept'] = 'application/json'
+    assert headers.getall('accept') == ['application/json']
+    del headers['x-forwarded-for']
+    assert 'X-Forwarded-For' not in headers
+    assert len(headers) == 1
+
+
+def test_request_header_attributes():
+    request = Request(method='OPTIONS')
+    request.headers.add(b'content-type', b'application/json; charset=utf-8')
+    request.headers.add(b'CONTENT-LENGTH', b'12')
+    request.headers.add(b'origin', b'http://acme.com')
+    assert request.type == 'json'
+    assert request.length == 12
+    assert request.preflight
+    assert request.get_header('Origin') == 'http://acme.com'
+
+
+def test_request_content_type_cached():
+    request = Request(method='POST')
+    request.headers.add(b'content-type', b'multipart/form-data; boundary=XyZ')
+    assert request.multipart and request.boundary == 'XyZ'
+    cached = request._content_type
+    assert request.type == 'form-data'
+    assert request._content_type is cached
+    request.headers['Content-Type'] = 'application/json'
+    assert request.type == 'json'
+    assert not request.boundary
+    request.headers = request.headers.copy()
+    del request.headers['Content-Type']
+    assert request.type == ''
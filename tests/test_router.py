@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from restfy import Application, Middleware, Request, Router
+from restfy.testing import Client
+from .acme.main import app
+
+
+async def handler():
+    return {}
+
+
+def test_static_route_match():
+    match = app.router.match('/servers', 'GET')
+    assert match.handler.func_name == 'get_servers_list'
+    assert match.args == {}
+    assert '/servers' in app.router.static
+
+
+def test_variable_route_match():
+    match = app.router.match('/servers/1/nodes', 'GET')
+    assert match.handler.func_name == 'get_nodes_list'
+    assert match.args == {'key': '1'}
+
+
+def test_route_match_results_are_independent():
+    first = app.router.match('/servers/1', 'GET')
+    second = app.router.match('/servers/2', 'GET')
+    assert first.route is second.route
+    assert first.args == {'key': '1'}
+    assert second.args == {'key': '2'}
+
+
+def test_route_not_matched():
+    assert app.router.match('/unknown', 'GET') is None
+    assert app.router.match('/servers', 'PATCH').handler is None
+
+
+def test_router_invalidated_by_subrouter():
+    router = Router()
+    items = Router()
+    router.register_router('/items', items)
+    assert router.match('/items/new', 'GET') is None
+    items.add_route('/new', handler)
+    assert router.match('/items/new', 'GET').handler.func_name == 'handler'
+
+
+def test_typed_path_variables():
+    router = Router()
+    router.add_route('/items/{id:int}', handler)
+    router.add_route('/items/{ref:uuid}', handler, method='DELETE')
+    router.add_route('/items/{slug:re:[a-z-]+}', handler, method='PUT')
+    router.add_route('/items/{name}', handler, method='PATCH')
+    router.add_route('/files/{path:path}', handler)
+    assert router.match('/items/10', 'GET').args == {'id': 10}
+    assert router.match('/items/ten', 'GET').handler is None
+    ref = '1b4e28ba-2fa1-11d2-883f-0016d3cca427'
+    assert str(router.match(f'/items/{ref}', 'DELETE').args['ref']) == ref
+    assert router.match('/items/some-item', 'PUT').args == {'slug': 'some-item'}
+    assert router.match('/items/Item_1', 'PATCH').args == {'name': 'Item_1'}
+    assert router.match('/files/css/site.css', 'GET').args == {'path': 'css/site.css'}
+
+
+def test_typed_path_variables_priority():
+    router = Router()
+    router.add_route('/items/{name}/detail', handler)
+    router.add_route('/items/{id:int}', handler)
+    assert router.match('/items/1', 'GET').args == {'id': 1}
+    assert router.match('/items/1/detail', 'GET').args == {'name': '1'}
+
+
+def test_typed_path_variables_method():
+    router = Router()
+    router.add_route('/items/new', handler)
+    router.add_route('/items/{id:int}', handler)
+    router.add_route('/items/{name}', handler, method='PATCH')
+    assert router.match('/items/5', 'PATCH').args == {'name': '5'}
+    assert router.match('/items/5', 'HEAD').args == {'id': 5}
+    assert router.match('/items/new', 'PATCH').args == {'name': 'new'}
+    match = router.match('/items/5', 'DELETE')
+    assert match.handler is None
+    assert match.args == {'id': 5}
+    assert router.match('/items/new', 'DELETE').handler is None
+
+def test_path_variable_names_per_route():
+    router = Router()
+    router.add_route('/items/{id}', handler)
+    router.add_route('/items/{pk}/x', handler, method='POST')
+    sub = Router()
+    sub.add_route('/{slug}', handler)
+    router.register_router('/tenants/{tenant}', sub)
+    assert router.match('/items/3', 'GET').args == {'id': '3'}
+    assert router.match('/items/3/x', 'POST').args == {'pk': '3'}
+    assert router.match('/tenants/acme/home', 'GET').args == {'tenant': 'acme', 'slug': 'home'}
+
+def test_router_match_cache():
+    router = Router(cache_size=2)
+    router.add_route('/items/{id:int}', handler)
+    first = router.match('/items/1', 'GET')
+    assert router.match('/items/1', 'GET') is first
+    router.match('/items/2', 'GET')
+    router.match('/items/3', 'GET')
+    assert list(router.cache) == [('GET', '/items/2'), ('GET', '/items/3')]
+    assert (router.cache_hits, router.cache_misses) == (1, 3)
+    router.add_route('/items/{id:int}', handler, method='DELETE')
+    assert not router.cache
+
+
+class TraceMiddleware(Middleware):
+    def __init__(self, name='app'):
+        super().__init__()
+        self.name = name
+
+    async def exec(self, request):
+        await asyncio.sleep(0)
+        response = await self.forward(request)
+        response.headers['Acme-Trace'] = f"{self.name},{response.headers.get('Acme-Trace', '')}".strip(',')
+        return response
+
+
+async def echo_handler(request: Request, key: str):
+    await asyncio.sleep(0)
+    return {'key': key, 'url': request.url}
+
+
+@pytest.mark.asyncio
+async def test_middleware_pipelines():
+    application = Application()
+    router = Router()
+    router.register_middleware(TraceMiddleware('nodes'))
+    router.add_route('/{key}', echo_handler, middlewares=[TraceMiddleware('route')])
+    application.register_middleware(TraceMiddleware)
+    application.register_router('/nodes', router)
+    application.add_route('/servers/{key}', echo_handler)
+    client = Client(application)
+    res = await client.get('/nodes/1')
+    assert res.headers['Acme-Trace'] == 'app,nodes,route'
+    res = await client.get('/servers/1')
+    assert res.headers['Acme-Trace'] == 'app'
+    assert all(middleware.next is None for middleware in application.middlewares)
+    responses = await asyncio.gather(*(client.get(f'/servers/{i}') for i in range(10)))
+    assert [res.parser()['key'] for res in responses] == [str(i) for i in range(10)]
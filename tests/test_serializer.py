@@ -0,0 +1,74 @@
+import datetime
+import decimal
+import json
+import uuid
+import bike
+import pytest
+from restfy.codec import JSONEncoder
+from restfy.handler import Handler
+from restfy.request import Request
+from restfy.serializer import register_serializer, serializers
+
+
+@bike.model()
+class Node:
+    id: int
+    name: str
+
+
+@bike.model()
+class Server:
+    id: int
+    name: str
+    nodes: list[Node] = bike.Field(default=[])
+
+
+class Money:
+    def __init__(self, amount):
+        self.amount = amount
+
+
+def test_builtin_serializers():
+    data = {
+        'created': datetime.datetime(2024, 5, 1, 10, 30),
+        'day': datetime.date(2024, 5, 1),
+        'price': decimal.Decimal('9.5'),
+        'ref': uuid.UUID(int=1),
+    }
+    assert json.loads(json.dumps(data, cls=JSONEncoder)) == {
+        'created': '2024-05-01T10:30:00',
+        'day': '2024-05-01',
+        'price': 9.5,
+        'ref': '00000000-0000-0000-0000-000000000001',
+    }
+
+
+def test_model_serializer_cached():
+    server = Server(id=1, name='trix', nodes=[{'id': 2, 'name': 'alpha'}])
+    assert json.loads(json.dumps(server, cls=JSONEncoder)) == server.dict()
+    assert Server in serializers and Node in serializers
+
+
+def test_register_serializer():
+    register_serializer(Money, lambda o: f'{o.amount:.2f}')
+    assert json.dumps([Money(3)], cls=JSONEncoder) == '["3.00"]'
+    with pytest.raises(TypeError):
+        json.dumps(object(), cls=JSONEncoder)
+
+
+async def list_servers() -> list[Server]:
+    return [Server(id=1, name='trix', nodes=[]), Server(id=2, name='vega', nodes=[])]
+
+
+async def get_server() -> Server:
+    return Server(id=1, name='trix', nodes=[])
+
+
+@pytest.mark.asyncio
+async def test_handler_returns_models():
+    res = await Handler(list_servers).execute(Request())
+    res.prepare()
+    assert res.parser() == [{'id': 1, 'name': 'trix', 'nodes': []}, {'id': 2, 'name': 'vega', 'nodes': []}]
+    res = await Handler(get_server).execute(Request())
+    res.prepare()
+    assert res.parser() == {'id': 1, 'name': 'trix', 'nodes': []}
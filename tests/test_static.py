@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from restfy import Application
+from restfy.static import StaticFiles
+from restfy.testing import Client
+from .mocks import MockWriter
+
+
+@pytest.fixture
+def application(tmp_path):
+    public = tmp_path / 'public'
+    (public / 'css').mkdir(parents=True)
+    (public / 'index.html').write_text('<h1>restfy</h1>')
+    (public / 'my file.txt').write_text('spaced')
+    (public / 'css' / 'site.css').write_text('body {}')
+    (public / 'report.bin').write_bytes(bytes(range(256)) * 1024)
+    (tmp_path / 'secret.txt').write_text('secret')
+    app = Application()
+    app.register_router('/static', StaticFiles(str(public), cache_file_size=1024))
+    return app
+
+
+@pytest.mark.asyncio
+async def test_static_small_files(application):
+    client = Client(application)
+    res = await client.get('/static/css/site.css')
+    assert res.status == 200
+    assert res.body == b'body {}'
+    assert res.headers['Content-Type'] == 'text/css'
+    assert res.headers['ETag'] and res.headers['Last-Modified']
+    res = await client.get('/static')
+    assert res.body == b'<h1>restfy</h1>'
+    res = await client.get('/static/css/site.css', headers={'Range': 'bytes=-2'})
+    assert res.status == 206
+    assert res.body == b'{}'
+    assert res.headers['Content-Range'] == 'bytes 5-6/7'
+    res = await client.get('/static/my%20file.txt')
+    assert res.body == b'spaced'
+
+
+@pytest.mark.asyncio
+async def test_static_path_traversal(application):
+    client = Client(application)
+    for url in ('/static/../secret.txt', '/static/css/../../secret.txt', '/static/%2e%2e/secret.txt', '/static/missing.txt'):
+        res = await client.get(url)
+        assert res.status == 404
+
+
+@pytest.mark.asyncio
+async def test_static_large_file_range(application):
+    reader = asyncio.StreamReader()
+    reader.feed_data(b'GET /static/report.bin HTTP/1.1\r\nRange: bytes=1000-70999\r\n\r\n')
+    reader.feed_eof()
+    writer = MockWriter()
+    await application.handler(reader, writer)
+    (head, body) = writer.data.split(b'\r\n\r\n', maxsplit=1)
+    assert head.startswith(b'HTTP/1.1 206')
+    assert b'Content-Length: 70000' in head
+    assert b'Content-Range: bytes 1000-70999/262144' in head
+    assert body == (bytes(range(256)) * 1024)[1000:71000]
+    res = await Client(application).get('/static/report.bin', headers={'Range': 'bytes=300000-'})
+    assert res.status == 416
+    assert res.headers['Content-Range'] == 'bytes */262144'
+
+
+@pytest.mark.asyncio
+async def test_static_sendfile(application):
+    server = await asyncio.start_server(application.handler, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        (reader, writer) = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /static/report.bin HTTP/1.1\r\n\r\n')
+        data = await reader.read()
+        writer.close()
+    (head, body) = data.split(b'\r\n\r\n', maxsplit=1)
+    assert b'Content-Length: 262144' in head
+    assert body == bytes(range(256)) * 1024